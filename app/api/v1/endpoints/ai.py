@@ -3,13 +3,16 @@ AI-powered features endpoints
 """
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import json
 import logging
 
 from ....models.quiz import QuizGenRequest, Question, DifficultyLevel
 from ....models.note import AiInsights
 from ....services.ai_service import AIService
 from ....services.book_service import BookService
+from ....services.reading_agent import get_reading_agent
 from .auth import get_current_user
 
 router = APIRouter()
@@ -335,6 +338,66 @@ async def ask_reading_question(
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
 
+@router.post("/reading/ask/stream")
+async def ask_reading_question_stream(
+    request: ReadingQuestionRequest,
+    current_user_id: str = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Answer a reading question with the reading agent, streamed as server-sent events.
+    Emits "delta" events with answer text as it is generated, then a final "done" event.
+    """
+    logger.info(f"📖 Streaming reading Q&A request for book_id={request.book_id}, page={request.current_page}")
+    
+    book_service = BookService()
+    book = await book_service.get_book(request.book_id)
+    
+    if not book:
+        logger.error(f"❌ Book not found: {request.book_id}")
+        raise HTTPException(status_code=404, detail="Book not found")
+    
+    if not book.file_url:
+        logger.error(f"❌ Book has no file_url")
+        raise HTTPException(status_code=400, detail="Book PDF not available")
+    
+    book_metadata = {
+        "book_id": request.book_id,
+        "title": book.title,
+        "author": book.author,
+        "subject": book.subject,
+        "current_page": request.current_page,
+        "total_pages": book.total_pages
+    }
+    
+    async def event_stream():
+        try:
+            async for event in get_reading_agent().ask_question_stream(
+                question=request.question,
+                book_file_path=book.file_url,
+                book_metadata=book_metadata,
+                user_id=current_user_id,
+                current_page=request.current_page,
+                selected_text=request.selected_text,
+                conversation_history=request.conversation_history
+            ):
+                if event["type"] == "done":
+                    event["result"].update({
+                        "current_page": request.current_page,
+                        "book_id": request.book_id,
+                        "user_id": current_user_id
+                    })
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming reading answer: {str(e)}")
+            yield f"data: {json.dumps({'type': 'error', 'detail': f'Error processing question: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/reading/quick-action")
 async def reading_quick_action(
     request: QuickActionRequest,
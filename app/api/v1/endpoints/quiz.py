@@ -11,6 +11,7 @@ from ....models.quiz import Quiz, QuizGenRequest, QuizResponse, QuizResult, Ques
 from ....services.book_service import BookService
 from ....services.ai_service import AIService
 from ....services.file_processor import FileProcessor
+from ....services.integration_service import invalidate_dashboard
 from ....core.firebase_config import get_db
 from .auth import get_current_user
 
@@ -218,6 +219,7 @@ async def generate_quiz(
             db.collection('users').document(current_user_id).update({
                 'user_quizzes': user_quizzes
             })
+            invalidate_dashboard(current_user_id)
             logger.info(f"✅ Quiz saved to user's collection")
         else:
             logger.warning(f"⚠️ User document not found: {current_user_id}")
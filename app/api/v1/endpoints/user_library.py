@@ -11,6 +11,7 @@ from datetime import datetime
 from ....models.book import BookResponse, BookCardResponse
 from ....models.user import UserBookProgress, ReadingStatus
 from ....services.book_service import BookService
+from ....services.integration_service import invalidate_dashboard
 from ....core.firebase_config import get_db
 from .auth import get_current_user
 
@@ -103,6 +104,7 @@ async def add_book_to_library(
         db.collection('users').document(current_user_id).update({
             'library_books': user_books
         })
+        invalidate_dashboard(current_user_id)
         
         return {
             "message": "Book added to your library successfully",
@@ -143,6 +145,7 @@ async def remove_book_from_library(
         db.collection('users').document(current_user_id).update({
             'library_books': user_books
         })
+        invalidate_dashboard(current_user_id)
         
         return {"message": "Book removed from your library successfully"}
         
@@ -332,6 +335,7 @@ async def update_reading_progress(
         db.collection('users').document(current_user_id).update({
             'library_books': user_books
         })
+        invalidate_dashboard(current_user_id)
         
         return {
             "message": "Reading progress updated successfully",
@@ -13,6 +13,7 @@ from ....models.quiz import (
     QuestionResult, DifficultyLevel
 )
 from ....services.book_service import BookService
+from ....services.integration_service import invalidate_dashboard
 from ....core.firebase_config import get_db
 from .auth import get_current_user
 import logging
@@ -94,6 +95,7 @@ async def save_quiz_to_user(
         db.collection('users').document(current_user_id).update({
             'user_quizzes': user_quizzes
         })
+        invalidate_dashboard(current_user_id)
         
         return {
             "message": "Quiz saved to your collection successfully",
@@ -270,6 +272,7 @@ async def submit_quiz_attempt(
         db.collection('users').document(current_user_id).update({
             'user_quizzes': user_quizzes
         })
+        invalidate_dashboard(current_user_id)
         
         logger.info(f"✅ Quiz attempt saved successfully to user document")
         logger.debug(f"Attempts array now has {len(attempts)} entries")
@@ -471,6 +474,7 @@ async def delete_user_quiz(
         db.collection('users').document(current_user_id).update({
             'user_quizzes': user_quizzes
         })
+        invalidate_dashboard(current_user_id)
         
         return {"message": "Quiz removed from your collection successfully"}
         
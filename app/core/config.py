@@ -14,6 +14,13 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "DEBUG"
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None  # uvicorn worker processes; defaults to 1 (in-process state isn't shared)
+    
+    # Server tuning (uvicorn)
+    BACKLOG: int = 4096  # Pending connections the listen socket queues during bursts
+    TIMEOUT_KEEP_ALIVE: int = 75  # Outlive the GCP load balancer's idle timeout so it never reuses a closed socket
+    LIMIT_CONCURRENCY: Optional[int] = 1000  # Answer 503 beyond this many in-flight connections/tasks
+    LIMIT_MAX_REQUESTS: Optional[int] = None  # Exit after this many requests; uvicorn 0.24 doesn't respawn workers
     
     # Firebase Configuration
     FIREBASE_PROJECT_ID: str
@@ -30,7 +37,7 @@ class Settings(BaseSettings):
     
     # File Storage
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
-    ALLOWED_FILE_TYPES: list = ["pdf", "epub", "docx"]
+    ALLOWED_FILE_TYPES: frozenset = frozenset({"pdf", "epub", "docx"})
     UPLOAD_DIR: str = "uploads"
     
     class Config:
@@ -3,7 +3,7 @@ Firebase configuration and initialization
 """
 import json
 import firebase_admin
-from firebase_admin import credentials, firestore, storage
+from firebase_admin import credentials, firestore, firestore_async, storage
 from .config import settings
 
 
@@ -43,6 +43,21 @@ def get_db():
     return firestore.client()
 
 
+def get_async_db():
+    """Get async Firestore database instance"""
+    return firestore_async.client()
+
+
 def get_storage():
     """Get Firebase Storage bucket instance"""
     return storage.bucket()
+
+
+def warm_up_firestore():
+    """Issue a trivial query so the Firestore gRPC channel is connected before real traffic"""
+    get_db().collection("_warmup").limit(1).get()
+
+
+def warm_up_auth():
+    """Fetch an OAuth access token so the first Auth/Storage call doesn't wait for one"""
+    firebase_admin.get_app().credential.get_access_token()
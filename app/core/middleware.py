@@ -0,0 +1,169 @@
+"""
+ASGI middleware used by the application
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+_SAFELISTED_HEADERS = {"Accept", "Accept-Language", "Content-Language", "Content-Type"}
+
+# Response headers are (name, value) byte pairs in ASGI, so build the constant ones once
+_ALLOW_ORIGIN = b"access-control-allow-origin"
+_ALLOW_HEADERS = b"access-control-allow-headers"
+_VARY_ORIGIN = (b"vary", b"Origin")
+_PREFLIGHT_OK = b"OK"
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes through routes whose bodies must not be compressed"""
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        skip_prefixes: Tuple[str, ...] = (),
+        skip_suffixes: Tuple[str, ...] = (),
+        **kwargs,
+    ) -> None:
+        super().__init__(app, **kwargs)
+        self.skip_prefixes = skip_prefixes
+        self.skip_suffixes = skip_suffixes
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path.startswith(self.skip_prefixes) or path.endswith(self.skip_suffixes):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+
+class FastCORSMiddleware:
+    """Pure-ASGI equivalent of Starlette's CORSMiddleware with every constant header pre-encoded"""
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Iterable[str] = (),
+        allow_methods: Iterable[str] = ("GET",),
+        allow_headers: Iterable[str] = (),
+        allow_credentials: bool = False,
+        expose_headers: Iterable[str] = (),
+        max_age: int = 600,
+    ) -> None:
+        allow_methods = tuple(allow_methods)
+        if "*" in allow_methods:
+            allow_methods = _ALL_METHODS
+        allow_headers = _SAFELISTED_HEADERS | set(allow_headers)
+        expose_headers = tuple(expose_headers)
+        
+        self.app = app
+        self.allow_origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.allow_all_origins = b"*" in self.allow_origins
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_methods = frozenset(method.encode("latin-1") for method in allow_methods)
+        self.allow_headers = frozenset(header.lower() for header in allow_headers)
+        self.explicit_allow_origin = not self.allow_all_origins or allow_credentials
+        
+        # Added to every cross-origin response; the echo variant is used when the origin is reflected
+        echo_headers = []
+        if allow_credentials:
+            echo_headers.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            echo_headers.append((b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1")))
+        self._echo_headers = tuple(echo_headers)
+        self._simple_headers = ((_ALLOW_ORIGIN, b"*"),) + self._echo_headers if self.allow_all_origins else self._echo_headers
+        
+        preflight_headers = [_VARY_ORIGIN if self.explicit_allow_origin else (_ALLOW_ORIGIN, b"*")]
+        preflight_headers.append((b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")))
+        preflight_headers.append((b"access-control-max-age", str(max_age).encode("latin-1")))
+        if not self.allow_all_headers:
+            preflight_headers.append((_ALLOW_HEADERS, ", ".join(sorted(allow_headers)).encode("latin-1")))
+        if allow_credentials:
+            preflight_headers.append((b"access-control-allow-credentials", b"true"))
+        preflight_headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        self._preflight_headers = tuple(preflight_headers)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # One pass over the request headers picks out everything CORS needs
+        origin = request_method = request_headers = None
+        has_cookie = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+            elif name == b"cookie":
+                has_cookie = True
+        
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self.preflight_response(origin, request_method, request_headers, send)
+            return
+        
+        if self.allow_all_origins:
+            echo_origin = has_cookie  # "*" is not honoured by browsers for credentialed requests
+        else:
+            echo_origin = origin in self.allow_origins
+        extra_headers = self._echo_headers + ((_ALLOW_ORIGIN, origin),) if echo_origin else self._simple_headers
+        
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", ()), *extra_headers]
+                if echo_origin:
+                    _add_vary_origin(headers)
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+    
+    async def preflight_response(
+        self, origin: bytes, request_method: bytes, request_headers: Optional[bytes], send: Send
+    ) -> None:
+        headers = list(self._preflight_headers)
+        failures = []
+        
+        if self.allow_all_origins or origin in self.allow_origins:
+            if self.explicit_allow_origin:
+                headers.append((_ALLOW_ORIGIN, origin))
+        else:
+            failures.append("origin")
+        
+        if request_method not in self.allow_methods:
+            failures.append("method")
+        
+        if self.allow_all_headers and request_headers is not None:
+            headers.append((_ALLOW_HEADERS, request_headers))
+        elif request_headers:
+            for header in request_headers.decode("latin-1").lower().split(","):
+                if header.strip() not in self.allow_headers:
+                    failures.append("headers")
+                    break
+        
+        if failures:
+            status, body = 400, ("Disallowed CORS " + ", ".join(failures)).encode("utf-8")
+        else:
+            status, body = 200, _PREFLIGHT_OK
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def _add_vary_origin(headers: List[Tuple[bytes, bytes]]) -> None:
+    """Add Origin to the response's Vary header, extending an existing one"""
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            headers[index] = (name, value + b", Origin")
+            return
+    headers.append(_VARY_ORIGIN)
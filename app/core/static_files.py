@@ -0,0 +1,107 @@
+"""
+Static file serving with cheap validators and explicit caching headers
+"""
+import functools
+import hashlib
+import mimetypes
+import os
+from typing import Dict, FrozenSet, Tuple
+
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+
+@functools.lru_cache(maxsize=4096)
+def _etag(size: int, mtime_ns: int) -> str:
+    """Strong ETag derived from file size and modification time only"""
+    return f'"{size:x}-{mtime_ns:x}"'
+
+
+def _if_none_match(scope: Scope) -> FrozenSet[str]:
+    """ETags listed in the request's If-None-Match header (weak prefixes dropped)"""
+    for name, value in scope["headers"]:
+        if name == b"if-none-match":
+            return frozenset(
+                tag.strip().removeprefix("W/") for tag in value.decode("latin-1").split(",")
+            )
+    return frozenset()
+
+
+class CachingStaticFiles(StaticFiles):
+    """StaticFiles with (size, mtime) ETags, a per-mount Cache-Control and 304s that never open the file"""
+    
+    def __init__(self, *args, cache_control: str = "public, max-age=3600", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+    
+    def file_response(
+        self,
+        full_path: "str | os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        etag = _etag(stat_result.st_size, stat_result.st_mtime_ns)
+        headers = {"etag": etag, "cache-control": self.cache_control}
+        
+        if status_code == 200:
+            tags = _if_none_match(scope)
+            if etag in tags or "*" in tags:
+                return Response(status_code=304, headers=headers)
+        
+        return FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+
+
+class PreloadedStaticFiles(CachingStaticFiles):
+    """CachingStaticFiles for a directory that never changes at runtime, served from memory once preloaded"""
+    
+    def __init__(self, *args, max_preload_size: int = 1024 * 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_preload_size = max_preload_size
+        self._files: Dict[str, Tuple[bytes, str, str]] = {}  # relative path -> (body, etag, media type)
+        self._large_files: Dict[str, Tuple[str, os.stat_result]] = {}  # relative path -> (full path, stat)
+    
+    def preload(self) -> int:
+        """Read every file under the directory into memory; returns the number of files indexed"""
+        files = {}
+        large_files = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                full_path = os.path.join(root, name)
+                stat_result = os.stat(full_path)
+                if stat_result.st_size > self.max_preload_size:
+                    # Too big to keep resident - streamed from disk, but never stat'ed again
+                    large_files[os.path.normpath(os.path.relpath(full_path, self.directory))] = (full_path, stat_result)
+                    continue
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                files[os.path.normpath(os.path.relpath(full_path, self.directory))] = (body, etag, media_type)
+        self._files = files
+        self._large_files = large_files
+        return len(files) + len(large_files)
+    
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        
+        large = self._large_files.get(path)
+        if large is not None:
+            return self.file_response(*large, scope)
+        
+        entry = self._files.get(path)
+        if entry is None and self.html:
+            entry = self._files.get(os.path.normpath(os.path.join(path, "index.html")))
+        if entry is None:
+            # Not preloaded (or a 404): fall back to the regular disk lookup
+            return await super().get_response(path, scope)
+        
+        body, etag, media_type = entry
+        headers = {"etag": etag, "cache-control": self.cache_control}
+        tags = _if_none_match(scope)
+        if etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
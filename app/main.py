@@ -0,0 +1,191 @@
+"""
+Ninja Tutor Backend API
+FastAPI application with Firebase integration (served as main:app, see main.py)
+"""
+import os
+import asyncio
+from pathlib import Path
+import logging
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import orjson
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.firebase_config import initialize_firebase, warm_up_auth, warm_up_firestore
+from app.core.middleware import FastCORSMiddleware, SelectiveGZipMiddleware
+from app.core.static_files import CachingStaticFiles, PreloadedStaticFiles
+from app.api.v1.router import api_router
+from app.services.reading_agent import get_reading_agent
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+# The format never uses thread/process fields, so don't look them up for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logger = logging.getLogger(__name__)
+
+# Health probes hit constantly; keep them out of the access log when it's on
+_UNLOGGED_PATHS = frozenset({"/health"})
+
+
+class _SkipHealthChecks(logging.Filter):
+    """Drop uvicorn access records for health probe paths"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        args = record.args
+        return not (isinstance(args, tuple) and len(args) > 2 and args[2].partition("?")[0] in _UNLOGGED_PATHS)
+
+
+logging.getLogger("uvicorn.access").addFilter(_SkipHealthChecks())
+
+
+async def _warm_up(name: str, warm_up) -> None:
+    """Run a blocking warmup call in a thread, logging rather than raising on failure"""
+    try:
+        await asyncio.to_thread(warm_up)
+        logger.debug(f"✅ {name} warmed up")
+    except Exception as e:
+        logger.warning(f"⚠️ {name} warmup failed: {e}")
+
+
+async def _openapi_json(request: Request) -> Response:
+    """OpenAPI schema encoded on the first request and served from those bytes afterwards"""
+    state = request.app.state
+    body = getattr(state, "openapi_bytes", None)
+    if body is None:
+        # Built lazily so a broken model schema fails this request, not startup
+        body = state.openapi_bytes = orjson.dumps(request.app.openapi())
+    return Response(content=body, media_type="application/json")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan management"""
+    # Startup
+    logger.info("🚀 Starting Ninja Tutor Backend...")
+    logger.debug(f"Debug mode: {settings.DEBUG}")
+    logger.debug(f"Log level: {settings.LOG_LEVEL}")
+    
+    initialize_firebase()
+    logger.info("✅ Firebase initialized")
+    
+    # Connect to Firestore/Auth in the background so startup doesn't wait on the network
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        app.state.warmup_tasks = [
+            asyncio.create_task(_warm_up("Firestore", warm_up_firestore)),
+            asyncio.create_task(_warm_up("Firebase Auth", warm_up_auth)),
+        ]
+    
+    # Build the reading agent now so the first question doesn't pay for it
+    try:
+        get_reading_agent()
+    except Exception as e:
+        logger.warning(f"⚠️ Reading agent not warmed up: {e}")
+    
+    # PDF.js assets are baked into the image - serve them from memory
+    if pdfjs_files is not None:
+        count = await asyncio.to_thread(pdfjs_files.preload)
+        logger.info(f"✅ Preloaded {count} PDF.js files")
+    
+    # Create upload directory (the /uploads mount serves from it)
+    try:
+        Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+        logger.info("✅ Upload directory ready")
+    except OSError as e:
+        logger.warning(f"⚠️ Could not create upload directory {settings.UPLOAD_DIR}: {e}")
+    
+    yield
+    
+    # Shutdown
+    logger.info("🛑 Shutting down Ninja Tutor Backend...")
+    
+    # Sessions are saved on a debounce - write out the last window before the process exits
+    try:
+        await get_reading_agent().flush_pending_writes()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not flush reading sessions: {e}")
+
+
+# Create FastAPI app
+app = FastAPI(
+    title="Ninja Tutor API",
+    description="Backend API for Ninja Tutor educational platform",
+    version="1.0.0",
+    # Schema and docs are a development aid only - no schema generation in production
+    docs_url="/docs" if settings.DEBUG else None,
+    redoc_url="/redoc" if settings.DEBUG else None,
+    openapi_url="/openapi.json" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,  # orjson instead of stdlib json for every route
+    lifespan=lifespan
+)
+
+# Response compression - added first so it sits innermost, under CORS
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    skip_prefixes=("/uploads",),  # PDFs/EPUBs are already compressed
+    skip_suffixes=("/stream",),  # gzip would hold SSE events back until the buffer fills
+)
+
+# CORS middleware
+ALLOWED_ORIGINS = frozenset({
+    "http://localhost:3000",  # Flutter web dev server
+    "http://127.0.0.1:3000",  # Alternative localhost
+    "http://localhost:8080",  # Alternative Flutter port
+    "http://127.0.0.1:8080",  # Alternative localhost
+    "*",  # Allow all for development (remove in production)
+})
+
+app.add_middleware(
+    FastCORSMiddleware,
+    allow_origins=list(ALLOWED_ORIGINS),
+    allow_credentials=True,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["*"],
+    expose_headers=["*"],  # Expose all headers
+)
+
+# Static files for uploaded content (every upload gets a fresh unique name, so cacheable forever)
+app.mount(
+    "/uploads",
+    CachingStaticFiles(
+        directory=settings.UPLOAD_DIR,
+        check_dir=False,  # Created in lifespan
+        cache_control="public, max-age=31536000, immutable",
+    ),
+    name="uploads"
+)
+
+# Static files for PDF.js viewer
+pdfjs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pdfjs")
+pdfjs_files = None
+if os.path.exists(pdfjs_dir):
+    pdfjs_files = PreloadedStaticFiles(directory=pdfjs_dir, html=True)
+    app.mount("/pdfjs", pdfjs_files, name="pdfjs")
+    logger.info("✅ PDF.js viewer mounted at /pdfjs")
+
+# API routes
+app.include_router(api_router, prefix="/api/v1")
+
+# Ahead of FastAPI's own /openapi.json, which re-serializes the schema on every request
+if app.openapi_url:
+    app.router.routes.insert(0, Route(app.openapi_url, _openapi_json, include_in_schema=False))
+
+# Health check - probed constantly, so the body is encoded once
+_HEALTH_BYTES = orjson.dumps({"status": "healthy", "message": "Ninja Tutor Backend is running"})
+_HEALTH_HEADERS = {"cache-control": "no-cache"}
+
+
+@app.get("/health")
+async def health_check():
+    return Response(content=_HEALTH_BYTES, media_type="application/json", headers=_HEALTH_HEADERS)
+
@@ -3,7 +3,8 @@ Book management service
 """
 import os
 import uuid
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional
 from datetime import datetime
 from fastapi import UploadFile, HTTPException
 
@@ -13,6 +14,17 @@ from .file_processor import FileProcessor
 from .firebase_storage import FirebaseStorageService
 
 
+def _to_datetime(value) -> datetime:
+    """Coerce a stored Firestore timestamp to datetime, defaulting to now"""
+    if value is None:
+        return datetime.now()
+    if isinstance(value, datetime):
+        # Firestore returns DatetimeWithNanoseconds, a datetime subclass
+        return value
+    ts = getattr(value, 'timestamp', None)
+    return datetime.fromtimestamp(ts()) if callable(ts) else datetime.now()
+
+
 class BookService:
     """Service for managing books"""
     
@@ -38,7 +50,7 @@ class BookService:
             
             # Create book metadata
             book_metadata = BookMetadata(
-                format=file.filename.split('.')[-1].upper() if file.filename else "UNKNOWN",
+                format=file.filename.rpartition('.')[2].upper() if file.filename else "UNKNOWN",
                 file_size=file.size / (1024 * 1024) if file.size else None  # Convert to MB
             )
             
@@ -61,11 +73,10 @@ class BookService:
             )
             
             # Save to Firestore
-            book_dict = book.dict()
-            book_dict['added_at'] = book.added_at
-            book_dict['metadata'] = book_metadata.dict()
+            # model_dump keeps added_at as datetime and metadata as a plain dict
+            book_dict = book.model_dump()
             
-            self.db.collection('books').document(book.id).set(book_dict)
+            await asyncio.to_thread(self.db.collection('books').document(book.id).set, book_dict)
             
             # Clean up temporary file after successful upload to Firebase Storage
             if temp_file_path:
@@ -101,13 +112,14 @@ class BookService:
             # Apply pagination
             query = query.limit(limit).offset(offset)
             
-            docs = query.stream()
+            docs = await asyncio.to_thread(lambda: list(query.stream()))
             books = []
             
             for doc in docs:
                 book_data = doc.to_dict()
                 # Return only essential fields for card display
-                book_card = BookCardResponse(
+                # (stored data is trusted, so skip per-row validation)
+                book_card = BookCardResponse.model_construct(
                     id=doc.id,
                     title=book_data.get('title', ''),
                     author=book_data.get('author', ''),
@@ -117,7 +129,7 @@ class BookService:
                     total_pages=book_data.get('total_pages', 0),
                     progress_percentage=0.0,  # No progress for global book list
                     last_read_at=book_data.get('last_read_at'),
-                    added_at=book_data.get('added_at', datetime.now())
+                    added_at=_to_datetime(book_data.get('added_at'))
                 )
                 books.append(book_card)
             
@@ -129,7 +141,7 @@ class BookService:
     async def get_book(self, book_id: str) -> Optional[Book]:
         """Get a single book by ID"""
         try:
-            doc = self.db.collection('books').document(book_id).get()
+            doc = await asyncio.to_thread(self.db.collection('books').document(book_id).get)
             
             if not doc.exists:
                 return None
@@ -142,6 +154,28 @@ class BookService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching book: {str(e)}")
     
+    async def get_books_bulk(self, book_ids: List[str]) -> Dict[str, Book]:
+        """Get several books by ID in a single batched read, keyed by book ID"""
+        if not book_ids:
+            return {}
+        
+        try:
+            refs = [self.db.collection('books').document(book_id) for book_id in book_ids]
+            snapshots = await asyncio.to_thread(lambda: list(self.db.get_all(refs)))
+            
+            books = {}
+            for doc in snapshots:
+                if not doc.exists:
+                    continue
+                book_data = doc.to_dict()
+                book_data['id'] = doc.id
+                books[doc.id] = Book(**book_data)
+            
+            return books
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching books: {str(e)}")
+    
     async def search_books(self, query: str, limit: int = 20) -> List[BookCardResponse]:
         """Search books by title, author, or subject - optimized for card display"""
         try:
@@ -153,12 +187,13 @@ class BookService:
             
             # Search in title (case-insensitive)
             title_query = self.db.collection('books').where('title', '>=', query).where('title', '<=', query + '\uf8ff').limit(limit)
-            title_docs = title_query.stream()
+            title_docs = await asyncio.to_thread(lambda: list(title_query.stream()))
             
             for doc in title_docs:
                 book_data = doc.to_dict()
                 # Return only essential fields for card display
-                book_card = BookCardResponse(
+                # (stored data is trusted, so skip per-row validation)
+                book_card = BookCardResponse.model_construct(
                     id=doc.id,
                     title=book_data.get('title', ''),
                     author=book_data.get('author', ''),
@@ -168,7 +203,7 @@ class BookService:
                     total_pages=book_data.get('total_pages', 0),
                     progress_percentage=0.0,
                     last_read_at=book_data.get('last_read_at'),
-                    added_at=book_data.get('added_at', datetime.now())
+                    added_at=_to_datetime(book_data.get('added_at'))
                 )
                 books.append(book_card)
             
@@ -190,7 +225,7 @@ class BookService:
                 await self.storage_service.delete_file_by_url(book.file_url)
             
             # Delete from Firestore
-            self.db.collection('books').document(book_id).delete()
+            await asyncio.to_thread(self.db.collection('books').document(book_id).delete)
             
             return True
             
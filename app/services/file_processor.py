@@ -1,13 +1,26 @@
 """
 File processing service for books
 """
+import io
 import os
-import uuid
+import re
+import mmap
+import asyncio
+import hashlib
+import multiprocessing
 import aiofiles
 import httpx
 import logging
-from typing import Tuple, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional
 from fastapi import UploadFile, HTTPException
+try:
+    import fitz  # PyMuPDF - C-backed extraction, much faster than pypdf
+except ImportError:
+    fitz = None
 try:
     from pypdf import PdfReader
 except ImportError:
@@ -19,82 +32,267 @@ from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Working directory at import time - relative book paths resolve against it
+_BASE_DIR = os.getcwd()
+
+# Path prefixes checked on every page request, as tuples for a single startswith call
+_URL_PREFIXES = ('http://', 'https://')
+_UPLOADS_PREFIXES = ('/uploads/', 'uploads/')
+
+# Word matcher for counting without materializing a token list
+_WORD_RE = re.compile(r"\S+")
+
+# Buffer/chunk size for file I/O - the 8 KiB default is far too small for book files
+_IO_BUFFER_SIZE = 1 << 18
+
+# Read size for streaming uploads to disk
+_UPLOAD_READ_SIZE = 1 << 20
+
+# Content-addressed cache for PDFs downloaded from URLs (sha256(url) -> file)
+_URL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ninja_pdf_cache")
+_URL_CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+_url_cache: Optional["OrderedDict[str, int]"] = None  # path -> size, least recently used first; seeded from disk
+
+# pypdf fallback: PDFs at least this large are memory-mapped instead of read into memory
+_MMAP_MIN_BYTES = 100 * 1024 * 1024
+
+# Parsed PDFs kept open across page requests: path -> _CachedDoc.
+# _doc_cache_lock only guards the dict; each document has its own lock for the time it is used.
+_DOC_CACHE_SIZE = 32
+_doc_cache: "OrderedDict[str, _CachedDoc]" = OrderedDict()
+_doc_cache_lock = threading.Lock()
+
+# PDFs at least this large are parsed in a worker process instead of a thread
+_PROCESS_POOL_MIN_BYTES = 10 * 1024 * 1024
+# Page ranges at least this long (of such large PDFs) are split across the worker processes
+_PARALLEL_MIN_PAGES = 16
+_PROCESS_POOL_WORKERS = min(4, os.cpu_count() or 1)
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# Explicit PyMuPDF text flags for every extraction path: keep whitespace, clip to the page, no extra processing
+_FITZ_TEXT_FLAGS = (fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP) if fitz is not None else 0
+
+
+class _CachedDoc:
+    """A parsed PDF in _doc_cache; hold lock while using doc (PyMuPDF documents aren't thread-safe)"""
+    __slots__ = ("version", "doc", "lock", "evicted", "closed")
+    
+    def __init__(self, version: tuple):
+        self.version = version
+        self.doc = None  # Opened by the first user, under lock
+        self.lock = threading.Lock()
+        self.evicted = False
+        self.closed = False
+
 
 class FileProcessor:
     """Service for processing uploaded book files"""
     
+    @staticmethod
+    def _remember_cached_download(path: str, size: int):
+        """Mark a cached download as most recently used and evict beyond the size cap"""
+        global _url_cache
+        if _url_cache is None:
+            # Downloads left by earlier processes count towards the cap too, oldest first
+            _url_cache = OrderedDict(FileProcessor._scan_url_cache_dir())
+        _url_cache[path] = size
+        _url_cache.move_to_end(path)
+        
+        total = sum(_url_cache.values())
+        while total > _URL_CACHE_MAX_BYTES and len(_url_cache) > 1:
+            evicted_path, evicted_size = _url_cache.popitem(last=False)
+            total -= evicted_size
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _scan_url_cache_dir() -> List[Tuple[str, int]]:
+        """(path, size) of every cached download on disk, least recently modified first"""
+        stats = []
+        try:
+            for entry in os.scandir(_URL_CACHE_DIR):
+                if entry.name.endswith(".pdf"):  # In-progress .tmp downloads aren't cache entries yet
+                    try:
+                        stats.append((entry.path, entry.stat()))
+                    except OSError:
+                        pass  # Replaced or evicted meanwhile
+        except FileNotFoundError:
+            return []
+        stats.sort(key=lambda item: item[1].st_mtime_ns)
+        return [(path, stat.st_size) for path, stat in stats]
+    
     @staticmethod
     async def download_file_from_url(url: str) -> str:
-        """Download a file from URL to temporary location"""
+        """Download a file from URL into the local download cache and return its path"""
+        os.makedirs(_URL_CACHE_DIR, exist_ok=True)
+        key = hashlib.sha256(url.encode()).hexdigest()
+        cache_path = os.path.join(_URL_CACHE_DIR, f"{key}.pdf")
+        
+        # Serve repeat requests for the same URL from the warm file
+        try:
+            size = os.path.getsize(cache_path)
+        except OSError:
+            size = 0
+        if size > 0:
+            FileProcessor._remember_cached_download(cache_path, size)
+            return cache_path
+        
+        temp_path = None
         try:
+            # Download to a temp file next to the cache entry, then move it into place atomically
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=_URL_CACHE_DIR)
+            os.close(fd)
+            
+            # Stream the body straight to disk instead of buffering it in memory
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                
-                # Create temporary file
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                temp_file.write(response.content)
-                temp_file.close()
-                
-                return temp_file.name
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async with aiofiles.open(temp_path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                        async for chunk in response.aiter_bytes(chunk_size=_IO_BUFFER_SIZE):
+                            await f.write(chunk)
+            
+            os.replace(temp_path, cache_path)
+            FileProcessor._remember_cached_download(cache_path, os.path.getsize(cache_path))
+            return cache_path
         except Exception as e:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
             raise HTTPException(status_code=500, detail=f"Error downloading file: {str(e)}")
     
     @staticmethod
     def _is_url(path: str) -> bool:
         """Check if path is a URL"""
-        return path.startswith('http://') or path.startswith('https://')
+        return path.startswith(_URL_PREFIXES)
+    
+    @staticmethod
+    async def _local_pdf_path(file_path: str) -> str:
+        """Resolve a book path or URL to a local file (URLs go through the download cache)"""
+        if file_path.startswith(_URL_PREFIXES):
+            return await FileProcessor.download_file_from_url(file_path)
+        return FileProcessor._resolve_file_path(file_path)
+    
+    @staticmethod
+    async def get_file_version(file_path: str) -> Tuple[int, int]:
+        """Return (mtime_ns, size) of the local copy of a book path or URL, for cache keys"""
+        stat = os.stat(await FileProcessor._local_pdf_path(file_path))
+        return stat.st_mtime_ns, stat.st_size
     
     @staticmethod
     def _resolve_file_path(file_path: str) -> str:
-        """Resolve file path to absolute path with comprehensive logging"""
-        logger.info(f"📁 Resolving file path: '{file_path}'")
-        logger.info(f"   Current working directory: {os.getcwd()}")
+        """Resolve file path to absolute path (details logged at DEBUG level)"""
+        logger.debug("📁 Resolving file path: '%s' (base dir: %s)", file_path, _BASE_DIR)
         
         # If it's a URL, return as-is
         if FileProcessor._is_url(file_path):
-            logger.info(f"   ✅ Detected as URL, returning as-is")
+            logger.debug("   ✅ Detected as URL, returning as-is")
             return file_path
         
-        # Special handling for /uploads/ paths (these are relative to project root, not absolute)
-        if file_path.startswith('/uploads/'):
-            file_path = file_path[1:]  # Remove leading slash → "uploads/..."
-            logger.info(f"   Detected /uploads/ path, stripped to: '{file_path}'")
-        
-        if file_path.startswith('uploads/'):
-            # Get the current working directory and join with uploads
-            base_dir = os.getcwd()
-            absolute_path = os.path.join(base_dir, file_path)
-            logger.info(f"   Resolved uploads/ path to: '{absolute_path}'")
-            logger.info(f"   File exists: {os.path.exists(absolute_path)}")
-            
-            # List what's actually in the uploads directory for debugging
-            uploads_dir = os.path.join(base_dir, 'uploads')
-            if os.path.exists(uploads_dir):
-                try:
-                    files = os.listdir(uploads_dir)
-                    logger.info(f"   📂 Files in uploads/: {len(files)} files")
-                    if files:
-                        logger.info(f"   Sample files: {files[:3]}")
-                except Exception as e:
-                    logger.warning(f"   ⚠️ Could not list uploads directory: {e}")
-            else:
-                logger.error(f"   ❌ Uploads directory does not exist: {uploads_dir}")
-            
+        # Special handling for uploads paths (relative to project root, even with a leading slash)
+        if file_path.startswith(_UPLOADS_PREFIXES):
+            absolute_path = os.path.join(_BASE_DIR, file_path.removeprefix('/'))
+            logger.debug("   Resolved uploads/ path to: '%s'", absolute_path)
             return absolute_path
         
-        # If it's already a real absolute path (not /uploads/), check if it exists
+        # If it's already a real absolute path (not /uploads/), use it as-is
         if os.path.isabs(file_path):
-            logger.info(f"   ✅ Already absolute path")
-            logger.info(f"   File exists: {os.path.exists(file_path)}")
+            logger.debug("   ✅ Already absolute path")
             return file_path
         
-        # Otherwise, treat as relative to current directory
-        absolute_path = os.path.abspath(file_path)
-        logger.info(f"   Resolved relative path to: '{absolute_path}'")
-        logger.info(f"   File exists: {os.path.exists(absolute_path)}")
+        # Otherwise, treat as relative to the project root
+        absolute_path = os.path.normpath(os.path.join(_BASE_DIR, file_path))
+        logger.debug("   Resolved relative path to: '%s'", absolute_path)
         return absolute_path
     
+    @staticmethod
+    def _close_doc(doc):
+        """Release a parsed PDF document"""
+        try:
+            if fitz is not None:
+                doc.close()
+            else:
+                doc.stream.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not close cached PDF: {e}")
+    
+    @staticmethod
+    def _load_pdf_stream(path: str):
+        """Load a PDF for pypdf: into memory, or memory-mapped for very large files"""
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size >= _MMAP_MIN_BYTES:
+                return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            return io.BytesIO(file.read())
+    
+    @staticmethod
+    def _doc_entry(path: str) -> _CachedDoc:
+        """Cache entry for path, replacing it when the file changed and evicting beyond the cache size"""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        retired = []
+        with _doc_cache_lock:
+            entry = _doc_cache.get(path)
+            if entry is not None and entry.version == version:
+                _doc_cache.move_to_end(path)
+                return entry
+            if entry is not None:
+                # File changed on disk - drop the stale document
+                del _doc_cache[path]
+                retired.append(entry)
+            
+            entry = _CachedDoc(version)
+            _doc_cache[path] = entry
+            while len(_doc_cache) > _DOC_CACHE_SIZE:
+                retired.append(_doc_cache.popitem(last=False)[1])
+        
+        for old in retired:
+            FileProcessor._retire_doc(old)
+        return entry
+    
+    @staticmethod
+    def _retire_doc(entry: _CachedDoc):
+        """Close a document dropped from the cache, or leave that to the thread still using it"""
+        entry.evicted = True
+        if entry.lock.acquire(blocking=False):
+            try:
+                if entry.doc is not None and not entry.closed:
+                    FileProcessor._close_doc(entry.doc)
+                entry.closed = True
+            finally:
+                entry.lock.release()
+    
+    @staticmethod
+    @contextmanager
+    def _cached_doc(path: str):
+        """Parsed PDF for path, reused while the file is unchanged and held exclusively inside the block"""
+        while True:
+            entry = FileProcessor._doc_entry(path)
+            with entry.lock:
+                if entry.closed:
+                    continue  # Evicted and closed before we got it - look up a fresh entry
+                if entry.doc is None:
+                    entry.doc = fitz.open(path) if fitz is not None else PdfReader(FileProcessor._load_pdf_stream(path))
+                try:
+                    yield entry.doc
+                finally:
+                    if entry.evicted:
+                        FileProcessor._close_doc(entry.doc)
+                        entry.closed = True
+                return
+    
+    @staticmethod
+    def _page_count(doc) -> int:
+        """Number of pages in a parsed PDF"""
+        return doc.page_count if fitz is not None else len(doc.pages)
+    
+    @staticmethod
+    def _page_text(doc, index: int) -> str:
+        """Text of one page (0-indexed) of a parsed PDF"""
+        if fitz is not None:
+            return doc.load_page(index).get_text("text", flags=_FITZ_TEXT_FLAGS)
+        return doc.pages[index].extract_text()
+    
     @staticmethod
     async def save_upload_file(upload_file: UploadFile) -> str:
         """Save uploaded file and return file path"""
@@ -102,21 +300,33 @@ class FileProcessor:
         if not FileProcessor.is_valid_file_type(upload_file.filename):
             raise HTTPException(status_code=400, detail="Invalid file type")
         
-        # Check file size
-        content = await upload_file.read()
-        if len(content) > settings.MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large")
+        # Stream the body to a per-request file, enforcing the size limit as we go
+        file_extension = f".{FileProcessor.file_extension(upload_file.filename)}"
+        total_size = 0
+        fd, file_path = tempfile.mkstemp(suffix=file_extension, dir=settings.UPLOAD_DIR)
+        os.close(fd)
         
-        # Generate unique filename
-        file_extension = os.path.splitext(upload_file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        return file_path
+        try:
+            async with aiofiles.open(file_path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                while chunk := await upload_file.read(_UPLOAD_READ_SIZE):
+                    total_size += len(chunk)
+                    if total_size > settings.MAX_FILE_SIZE:
+                        raise HTTPException(status_code=400, detail="File too large")
+                    await f.write(chunk)
+            
+            return file_path
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+    
+    @staticmethod
+    def file_extension(filename: str) -> str:
+        """Return the lowercase extension of a file name or path without the dot ('' if none)"""
+        _, dot, extension = filename.rpartition('.')
+        if not dot or '/' in extension or '\\' in extension:
+            return ''
+        return extension.lower()
     
     @staticmethod
     def is_valid_file_type(filename: str) -> bool:
@@ -124,145 +334,208 @@ class FileProcessor:
         if not filename:
             return False
         
-        extension = os.path.splitext(filename)[1].lower().lstrip('.')
-        return extension in settings.ALLOWED_FILE_TYPES
+        return FileProcessor.file_extension(filename) in settings.ALLOWED_FILE_TYPES
+    
+    @staticmethod
+    def _get_process_pool() -> ProcessPoolExecutor:
+        """Shared process pool for CPU-heavy PDF parsing"""
+        global _process_pool
+        if _process_pool is None:
+            # Spawn, not fork: forked children would inherit open PDF handles and held locks
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+    
+    @staticmethod
+    def _extract_pdf_sync(file_path: str) -> Tuple[str, int]:
+        """Blocking whole-document PDF extraction (runs in a worker thread or process)"""
+        if fitz is not None:
+            with fitz.open(file_path) as doc:
+                page_count = doc.page_count
+                text_content = "\n".join(page.get_text("text", flags=_FITZ_TEXT_FLAGS) for page in doc)
+            return text_content.strip(), page_count
+        
+        stream = FileProcessor._load_pdf_stream(file_path)
+        try:
+            pdf_reader = PdfReader(stream)
+            page_count = len(pdf_reader.pages)
+            text_content = "\n".join(page.extract_text() for page in pdf_reader.pages)
+        finally:
+            stream.close()
+        
+        return text_content.strip(), page_count
     
     @staticmethod
     async def extract_text_from_pdf(file_path: str) -> Tuple[str, int]:
         """Extract text from PDF file"""
         try:
-            text_content = ""
-            page_count = 0
-            
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
             
-            with open(file_path, 'rb') as file:
-                pdf_reader = PdfReader(file)
-                page_count = len(pdf_reader.pages)
-                
-                for page_num in range(page_count):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    text_content += page_text + "\n"
+            # Large books are parsed in a separate process so they use another core
+            if os.path.getsize(file_path) >= _PROCESS_POOL_MIN_BYTES:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    FileProcessor._get_process_pool(), FileProcessor._extract_pdf_sync, file_path
+                )
             
-            return text_content.strip(), page_count
+            return await asyncio.to_thread(FileProcessor._extract_pdf_sync, file_path)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
     
+    @staticmethod
+    def _extract_pdf_page_sync(resolved_path: str, page_number: int) -> str:
+        """Blocking single-page extraction from a local PDF (1-indexed)"""
+        with FileProcessor._cached_doc(resolved_path) as doc:
+            page_count = FileProcessor._page_count(doc)
+            
+            # Validate page number
+            if page_number < 1 or page_number > page_count:
+                raise ValueError(f"Page number {page_number} out of range (1-{page_count})")
+            
+            # Extract text from the specified page (convert to 0-indexed)
+            return FileProcessor._page_text(doc, page_number - 1).strip()
+    
     @staticmethod
     async def extract_text_from_pdf_page(file_path: str, page_number: int) -> str:
         """Extract text from a single PDF page (1-indexed)"""
-        temp_file = None
         try:
-            # Resolve file path (handles URLs, relative paths, absolute paths)
-            resolved_path = FileProcessor._resolve_file_path(file_path)
-            
-            # Handle URLs by downloading first
-            if FileProcessor._is_url(resolved_path):
-                temp_file = await FileProcessor.download_file_from_url(resolved_path)
-                resolved_path = temp_file
+            # Resolve to a local file (URLs are served from the download cache when warm)
+            resolved_path = await FileProcessor._local_pdf_path(file_path)
             
             if not os.path.exists(resolved_path):
                 raise FileNotFoundError(f"File not found: {resolved_path} (original: {file_path})")
             
-            with open(resolved_path, 'rb') as file:
-                pdf_reader = PdfReader(file)
-                page_count = len(pdf_reader.pages)
-                
-                # Validate page number
-                if page_number < 1 or page_number > page_count:
-                    raise ValueError(f"Page number {page_number} out of range (1-{page_count})")
-                
-                # Extract text from the specified page (convert to 0-indexed)
-                page = pdf_reader.pages[page_number - 1]
-                page_text = page.extract_text()
-                
-                return page_text.strip()
+            # Pages of large books are parsed in the worker processes, which keep their own open documents
+            if os.path.getsize(resolved_path) >= _PROCESS_POOL_MIN_BYTES:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    FileProcessor._get_process_pool(), FileProcessor._extract_pdf_page_sync, resolved_path, page_number
+                )
+            
+            return await asyncio.to_thread(FileProcessor._extract_pdf_page_sync, resolved_path, page_number)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error extracting page {page_number}: {str(e)}")
-        finally:
-            # Clean up temporary file if created
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
+    
+    @staticmethod
+    def _pdf_page_count_sync(resolved_path: str) -> int:
+        """Blocking page count of a local PDF"""
+        with FileProcessor._cached_doc(resolved_path) as doc:
+            return FileProcessor._page_count(doc)
+    
+    @staticmethod
+    async def get_pdf_page_count(file_path: str) -> int:
+        """Number of pages in a PDF book path or URL"""
+        resolved_path = await FileProcessor._local_pdf_path(file_path)
+        return await asyncio.to_thread(FileProcessor._pdf_page_count_sync, resolved_path)
+    
+    @staticmethod
+    async def _extract_pdf_pages_parallel(resolved_path: str, start_page: int, end_page: int) -> str:
+        """Extract a long page range as contiguous chunks, one per worker process"""
+        page_count = await asyncio.to_thread(FileProcessor._pdf_page_count_sync, resolved_path)
+        if start_page < 1 or end_page > page_count or start_page > end_page:
+            raise ValueError(
+                f"Invalid page range {start_page}-{end_page} for document with {page_count} pages"
+            )
+        
+        # Each worker keeps its own document cache, so a chunk costs one open per worker at most
+        step = -(-(end_page - start_page + 1) // _PROCESS_POOL_WORKERS)
+        loop = asyncio.get_running_loop()
+        pool = FileProcessor._get_process_pool()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool, FileProcessor._extract_pdf_pages_sync,
+                resolved_path, chunk_start, min(chunk_start + step - 1, end_page)
+            )
+            for chunk_start in range(start_page, end_page + 1, step)
+        ))
+        
+        # Chunks are stripped individually; restore the blank line between page sections
+        return "\n\n".join(chunks)
+    
+    @staticmethod
+    def _extract_pdf_pages_sync(resolved_path: str, start_page: int, end_page: int) -> str:
+        """Blocking page-range extraction from a local PDF (inclusive, 1-indexed)"""
+        with FileProcessor._cached_doc(resolved_path) as doc:
+            page_count = FileProcessor._page_count(doc)
+            logger.info(f"📄 PDF has {page_count} pages")
+            
+            # Validate page range
+            if start_page < 1 or end_page > page_count or start_page > end_page:
+                raise ValueError(
+                    f"Invalid page range {start_page}-{end_page} for document with {page_count} pages"
+                )
+            
+            # Extract text from the specified range (convert to 0-indexed)
+            logger.info(f"📖 Extracting text from pages {start_page}-{end_page}...")
+            if fitz is not None:
+                # doc.pages() walks the range lazily inside PyMuPDF
+                page_texts = (
+                    page.get_text("text", flags=_FITZ_TEXT_FLAGS)
+                    for page in doc.pages(start_page - 1, end_page)
+                )
+            else:
+                page_texts = (doc.pages[i].extract_text() for i in range(start_page - 1, end_page))
+            
+            parts = []
+            for page_num, page_text in enumerate(page_texts, start_page):
+                parts.append(f"\n--- Page {page_num} ---\n{page_text}\n")
+                logger.debug("   Page %d: %d chars extracted", page_num, len(page_text))
+            text_content = "".join(parts)
+            
+            logger.info(f"✅ Successfully extracted {len(text_content)} total characters")
+            return text_content.strip()
     
     @staticmethod
     async def extract_text_from_pdf_pages(file_path: str, start_page: int, end_page: int) -> str:
         """Extract text from specific page range (inclusive, 1-indexed)"""
-        temp_file = None
         try:
             logger.info(f"🔍 extract_text_from_pdf_pages called with: '{file_path}', pages {start_page}-{end_page}")
             
-            # Resolve file path (handles URLs, relative paths, absolute paths)
-            resolved_path = FileProcessor._resolve_file_path(file_path)
+            # Resolve to a local file (URLs are served from the download cache when warm)
+            resolved_path = await FileProcessor._local_pdf_path(file_path)
             logger.info(f"✅ Path resolved to: '{resolved_path}'")
             
-            # Handle URLs by downloading first
-            if FileProcessor._is_url(resolved_path):
-                logger.info(f"🌐 Downloading PDF from URL...")
-                temp_file = await FileProcessor.download_file_from_url(resolved_path)
-                resolved_path = temp_file
-                logger.info(f"✅ Downloaded to temp file: '{resolved_path}'")
-            
             if not os.path.exists(resolved_path):
                 logger.error(f"❌ File does not exist at resolved path: '{resolved_path}'")
                 raise FileNotFoundError(f"File not found: {resolved_path} (original: {file_path})")
             
             logger.info(f"✅ File exists, opening PDF...")
             
-            with open(resolved_path, 'rb') as file:
-                pdf_reader = PdfReader(file)
-                page_count = len(pdf_reader.pages)
-                logger.info(f"📄 PDF has {page_count} pages")
-                
-                # Validate page range
-                if start_page < 1 or end_page > page_count or start_page > end_page:
-                    raise ValueError(
-                        f"Invalid page range {start_page}-{end_page} for document with {page_count} pages"
-                    )
-                
-                # Extract text from the specified range (convert to 0-indexed)
-                logger.info(f"📖 Extracting text from pages {start_page}-{end_page}...")
-                text_content = ""
-                for page_num in range(start_page - 1, end_page):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    text_content += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                    logger.info(f"   Page {page_num + 1}: {len(page_text)} chars extracted")
-                
-                logger.info(f"✅ Successfully extracted {len(text_content)} total characters")
-                return text_content.strip()
+            # Same threshold as the other pool paths - small books aren't worth the process hop
+            if (
+                end_page - start_page + 1 >= _PARALLEL_MIN_PAGES
+                and os.path.getsize(resolved_path) >= _PROCESS_POOL_MIN_BYTES
+            ):
+                return await FileProcessor._extract_pdf_pages_parallel(resolved_path, start_page, end_page)
+            
+            return await asyncio.to_thread(
+                FileProcessor._extract_pdf_pages_sync, resolved_path, start_page, end_page
+            )
         except Exception as e:
             logger.error(f"❌ Error in extract_text_from_pdf_pages: {str(e)}")
             logger.exception("Full traceback:")
             raise HTTPException(status_code=500, detail=f"Error extracting pages {start_page}-{end_page}: {str(e)}")
-        finally:
-            # Clean up temporary file if created
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    logger.info(f"🧹 Cleaning up temp file: {temp_file}")
-                    os.remove(temp_file)
-                except Exception as cleanup_error:
-                    logger.warning(f"⚠️ Failed to clean up temp file: {cleanup_error}")
+    
+    @staticmethod
+    def _extract_docx_sync(file_path: str) -> Tuple[str, int]:
+        """Blocking DOCX extraction (runs in a worker thread)"""
+        doc = Document(file_path)
+        text_content = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+        
+        # Estimate page count based on word count (approximately 250 words per page)
+        word_count = FileProcessor._count_words(text_content)
+        estimated_pages = max(1, word_count // 250)
+        
+        return text_content.strip(), estimated_pages
     
     @staticmethod
     async def extract_text_from_docx(file_path: str) -> Tuple[str, int]:
         """Extract text from DOCX file"""
         try:
-            doc = Document(file_path)
-            text_content = ""
-            
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
-            
-            # Estimate page count based on word count (approximately 250 words per page)
-            word_count = len(text_content.split())
-            estimated_pages = max(1, word_count // 250)
-            
-            return text_content.strip(), estimated_pages
+            return await asyncio.to_thread(FileProcessor._extract_docx_sync, file_path)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error processing DOCX: {str(e)}")
     
@@ -276,21 +549,26 @@ class FileProcessor:
     @staticmethod
     async def process_book_file(file_path: str) -> Tuple[str, int]:
         """Process book file and extract text content"""
-        file_extension = os.path.splitext(file_path)[1].lower()
+        file_extension = FileProcessor.file_extension(file_path)
         
-        if file_extension == '.pdf':
+        if file_extension == 'pdf':
             return await FileProcessor.extract_text_from_pdf(file_path)
-        elif file_extension == '.docx':
+        elif file_extension == 'docx':
             return await FileProcessor.extract_text_from_docx(file_path)
-        elif file_extension == '.epub':
+        elif file_extension == 'epub':
             return await FileProcessor.extract_text_from_epub(file_path)
         else:
             raise HTTPException(status_code=400, detail="Unsupported file format")
     
+    @staticmethod
+    def _count_words(text: str) -> int:
+        """Count whitespace-separated words without building a list of them"""
+        return sum(1 for _ in _WORD_RE.finditer(text))
+    
     @staticmethod
     def estimate_reading_time(text: str) -> int:
         """Estimate reading time in minutes (average 200 words per minute)"""
-        word_count = len(text.split())
+        word_count = FileProcessor._count_words(text)
         return max(1, word_count // 200)
     
     @staticmethod
@@ -3,11 +3,15 @@ Firebase Storage service
 """
 import os
 import uuid
+import asyncio
 from typing import Optional
 from fastapi import HTTPException
 
 from ..core.firebase_config import get_storage
 
+# Resumable upload chunk size (must be a multiple of 256 KiB); larger chunks mean fewer requests
+_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 class FirebaseStorageService:
     """Service for managing Firebase Storage operations"""
@@ -19,15 +23,16 @@ class FirebaseStorageService:
         """Upload book file to Firebase Storage"""
         try:
             # Generate unique storage path
-            file_extension = os.path.splitext(original_filename)[1]
+            _, dot, extension = original_filename.rpartition('.')
+            file_extension = f".{extension.lower()}" if dot else ""
             storage_path = f"books/{uuid.uuid4()}{file_extension}"
             
-            # Upload file
-            blob = self.bucket.blob(storage_path)
-            blob.upload_from_filename(file_path)
+            # Upload file (blocking client calls run in a worker thread)
+            blob = self.bucket.blob(storage_path, chunk_size=_UPLOAD_CHUNK_SIZE)
+            await asyncio.to_thread(blob.upload_from_filename, file_path, timeout=120)
             
             # Make file publicly accessible
-            blob.make_public()
+            await asyncio.to_thread(blob.make_public)
             
             return blob.public_url
             
@@ -40,9 +45,9 @@ class FirebaseStorageService:
             file_extension = os.path.splitext(file_path)[1]
             storage_path = f"covers/{book_id}{file_extension}"
             
-            blob = self.bucket.blob(storage_path)
-            blob.upload_from_filename(file_path)
-            blob.make_public()
+            blob = self.bucket.blob(storage_path, chunk_size=_UPLOAD_CHUNK_SIZE)
+            await asyncio.to_thread(blob.upload_from_filename, file_path, timeout=120)
+            await asyncio.to_thread(blob.make_public)
             
             return blob.public_url
             
@@ -55,9 +60,9 @@ class FirebaseStorageService:
             file_extension = os.path.splitext(file_path)[1]
             storage_path = f"avatars/{user_id}{file_extension}"
             
-            blob = self.bucket.blob(storage_path)
-            blob.upload_from_filename(file_path)
-            blob.make_public()
+            blob = self.bucket.blob(storage_path, chunk_size=_UPLOAD_CHUNK_SIZE)
+            await asyncio.to_thread(blob.upload_from_filename, file_path, timeout=120)
+            await asyncio.to_thread(blob.make_public)
             
             return blob.public_url
             
@@ -77,7 +82,7 @@ class FirebaseStorageService:
                     blob_path = blob_path.replace("%2F", "/")  # Decode URL encoding
                     
                     blob = self.bucket.blob(blob_path)
-                    blob.delete()
+                    await asyncio.to_thread(blob.delete)
                     return True
             
             return False
@@ -2,14 +2,27 @@
 Integration service to coordinate between AI, Quiz, and User data
 Makes screens fully operational by providing combined data
 """
+import heapq
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from cachetools import TTLCache
 
 from ..core.firebase_config import get_db
 from .ai_service import AIService
 from .book_service import BookService
 
+# Dashboard payloads per user, reused between app opens for a short while
+_dashboard_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Sort key fallback for books that have never been opened
+_DATETIME_MIN = datetime.min
+
+
+def invalidate_dashboard(user_id: str):
+    """Drop a user's cached dashboard after their library or quiz data changes"""
+    _dashboard_cache.pop(user_id, None)
+
 
 class IntegrationService:
     """Service for integrating AI with user data for operational screens"""
@@ -21,6 +34,10 @@ class IntegrationService:
     
     async def get_dashboard_data(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive dashboard data with AI recommendations"""
+        cached = _dashboard_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
             # Get user document
             user_doc = self.db.collection('users').document(user_id).get()
@@ -34,10 +51,12 @@ class IntegrationService:
             user_quizzes = user_data.get('user_quizzes', {})
             progress = user_data.get('progress', {})
             
-            # Get recent books (for continue reading)
+            # Get recent books (for continue reading) - one batched read for the whole library
+            books_map = await self.book_service.get_books_bulk(list(library_books.keys()))
+            
             recent_books = []
             for book_id, book_data in library_books.items():
-                book = await self.book_service.get_book(book_id)
+                book = books_map.get(book_id)
                 if book:
                     progress_data = book_data.get('progress', {})
                     recent_books.append({
@@ -52,17 +71,18 @@ class IntegrationService:
                         'last_read_at': progress_data.get('last_read_at')
                     })
             
-            # Sort by last_read_at
-            recent_books.sort(
-                key=lambda x: x.get('last_read_at') or datetime.min,
-                reverse=True
+            # Top 5 by last_read_at without sorting the whole library
+            top_recent = heapq.nlargest(
+                5,
+                recent_books,
+                key=lambda x: x.get('last_read_at') or _DATETIME_MIN
             )
             
             # Get quiz statistics
             quiz_stats = self._calculate_quiz_stats(user_quizzes)
             
             # Generate AI recommendations
-            recent_subjects = list(set([b['subject'] for b in recent_books[:5]]))
+            recent_subjects = list(set([b['subject'] for b in top_recent]))
             ai_recommendations = await self.ai_service.generate_study_recommendations(
                 user_id=user_id,
                 reading_history=[b['book_id'] for b in recent_books],
@@ -70,7 +90,7 @@ class IntegrationService:
                 quiz_performance=quiz_stats.get('subject_performance', {})
             )
             
-            return {
+            dashboard_data = {
                 "progress": {
                     "total_books_read": progress.get('total_books_read', 0),
                     "current_streak": progress.get('current_streak', 0),
@@ -78,12 +98,15 @@ class IntegrationService:
                     "total_quizzes_taken": progress.get('total_quizzes_taken', 0),
                     "average_quiz_score": progress.get('average_quiz_score', 0.0)
                 },
-                "recent_books": recent_books[:5],
+                "recent_books": top_recent,
                 "quiz_stats": quiz_stats,
                 "ai_recommendations": ai_recommendations.get('recommendations', []),
-                "quick_actions": self._generate_quick_actions(recent_books, user_quizzes)
+                "quick_actions": self._generate_quick_actions(top_recent, user_quizzes)
             }
             
+            _dashboard_cache[user_id] = dashboard_data
+            return dashboard_data
+            
         except HTTPException:
             raise
         except Exception as e:
@@ -101,29 +124,29 @@ class IntegrationService:
         
         total_quizzes = len(user_quizzes)
         total_attempts = 0
-        all_scores = []
-        subject_scores = {}
+        total_score = 0.0
+        subject_sums = {}  # subject -> [score sum, attempt count]
         
         for quiz_id, quiz_data in user_quizzes.items():
             attempts = quiz_data.get('attempts', [])
-            total_attempts += len(attempts)
-            
             subject = quiz_data.get('subject', 'Unknown')
             
             for attempt in attempts:
                 score = attempt.get('percentage', 0)
-                all_scores.append(score)
-                
-                if subject not in subject_scores:
-                    subject_scores[subject] = []
-                subject_scores[subject].append(score)
+                # Only subjects with at least one attempt get an entry
+                sums = subject_sums.setdefault(subject, [0.0, 0])
+                sums[0] += score
+                sums[1] += 1
+                total_score += score
+                total_attempts += 1
         
         # Calculate averages
-        avg_score = sum(all_scores) / len(all_scores) if all_scores else 0.0
+        avg_score = total_score / total_attempts if total_attempts else 0.0
         
-        subject_performance = {}
-        for subject, scores in subject_scores.items():
-            subject_performance[subject] = sum(scores) / len(scores) if scores else 0.0
+        subject_performance = {
+            subject: score_sum / count
+            for subject, (score_sum, count) in subject_sums.items()
+        }
         
         return {
             "total_quizzes": total_quizzes,
@@ -187,22 +210,28 @@ class IntegrationService:
             # Suggest quizzes for books without quizzes
             books_with_quizzes = set(quiz_data.get('book_id') for quiz_data in user_quizzes.values())
             
+            # Only suggest if they've read some - filter before fetching any books
+            candidates = []
             for book_id, book_data in library_books.items():
-                if book_id not in books_with_quizzes:
-                    book = await self.book_service.get_book(book_id)
-                    if book:
-                        progress_data = book_data.get('progress', {})
-                        current_page = progress_data.get('current_page', 0)
-                        
-                        if current_page > 10:  # Only suggest if they've read some
-                            suggestions.append({
-                                "type": "generate_quiz",
-                                "book_id": book_id,
-                                "book_title": book.title,
-                                "subject": book.subject,
-                                "suggested_page_range": [1, min(current_page, 50)],
-                                "reason": f"You've read {current_page} pages - test your knowledge!"
-                            })
+                if book_id in books_with_quizzes:
+                    continue
+                current_page = book_data.get('progress', {}).get('current_page', 0)
+                if current_page > 10:
+                    candidates.append((book_id, current_page))
+            
+            books_map = await self.book_service.get_books_bulk([book_id for book_id, _ in candidates])
+            
+            for book_id, current_page in candidates:
+                book = books_map.get(book_id)
+                if book:
+                    suggestions.append({
+                        "type": "generate_quiz",
+                        "book_id": book_id,
+                        "book_title": book.title,
+                        "subject": book.subject,
+                        "suggested_page_range": [1, min(current_page, 50)],
+                        "reason": f"You've read {current_page} pages - test your knowledge!"
+                    })
             
             # Suggest retrying quizzes with low scores
             for quiz_id, quiz_data in user_quizzes.items():
@@ -10,74 +10,130 @@ calling to extract and analyze PDF content. The agent can:
 The agent uses Gemini 2.0 Flash (experimental) with native function calling, which provides
 the same agentic behavior as Google ADK but integrates more seamlessly with async FastAPI.
 """
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+import asyncio
+import functools
 import logging
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
 import google.generativeai as genai
+from cachetools import TTLCache
+try:
+    import numpy as np  # Embedding index for semantic_search
+except ImportError:
+    np = None
 from google.generativeai.types import FunctionDeclaration, Tool
 
 from ..core.config import settings
-from ..core.firebase_config import get_db
+from ..core.firebase_config import get_async_db
 from .file_processor import FileProcessor
 
 logger = logging.getLogger(__name__)
 
+_MODEL_NAME = 'gemini-2.0-flash-exp'
+_SYSTEM_INSTRUCTION = """You are an expert educational AI assistant helping students understand their textbook.
+Always use your tools (get_page_content, extract_page_range, search_in_pages, semantic_search) to read the book before answering; quote passages and cite page numbers.
+If the book does not contain the answer, say so clearly. Be concise, accurate and encouraging."""
+
+# Tool results keyed by (tool, book path, file version, args). Every tool is read-only,
+# so all of them are cacheable; searches expire sooner than raw page text.
+_TOOL_CACHE_SIZE = 256
+_TOOL_CACHE_TTLS = {
+    "get_page_content": 600,
+    "extract_page_range": 600,
+    "search_in_pages": 60,
+    "semantic_search": 600,
+}
+
+# search_in_pages stops scanning once it has this many matches
+_SEARCH_MAX_RESULTS = 10
+
+# Tool arguments declared as integers
+_INT_ARGS = frozenset({"page_number", "start_page", "end_page", "k"})
+
+# semantic_search: books are split into ~400-token passages, embedded once per book version
+_EMBEDDING_MODEL = "models/text-embedding-004"
+_PASSAGE_CHARS = 1600
+_EMBED_BATCH_SIZE = 100  # Passages per batch embedding request
+_SEMANTIC_INDEX_WAIT = 20  # Seconds a query waits for a book's index to finish building
+_SEMANTIC_MAX_RESULTS = 10
+
+# In-memory conversation sessions kept before the least recently used is dropped
+MAX_SESSIONS = 1000
+# Session saves within this window (seconds) are coalesced into one Firebase write
+_SESSION_SAVE_DELAY = 2.0
+_FIRESTORE_BATCH_LIMIT = 500
+# Seconds a session read from Firebase is reused before fetching it again
+_SESSION_LOAD_TTL = 30
+
+# Tool results shorter than this after the first turn are usually enough to answer from
+_SHORT_RESULT_CHARS = 5000
+
+# Books whose extracted page text is kept in memory for reuse across tool calls
+_PAGE_INDEX_BOOKS = 32
+# Page indexes persisted across restarts as zlib-compressed JSON (outside the public uploads/ mount)
+_PAGE_INDEX_DIR = os.path.join(tempfile.gettempdir(), "ninja_page_index")
+_PAGE_INDEX_FORMAT = 1
+_PAGE_INDEX_MAX_BYTES = 256 * 1024 ** 2  # Least recently used books are evicted beyond this (/tmp may be RAM)
+# Concurrent extractions per agent, and the span length above which one range call beats per-page calls
+_EXTRACT_CONCURRENCY = 8
+_RANGE_EXTRACT_MIN_PAGES = 5
+# Page separator lines written by FileProcessor's page-range extraction
+_PAGE_MARKER_RE = re.compile(r'^--- Page (\d+) ---$', re.MULTILINE)
+
 
 class ReadingAgentService:
     """Intelligent reading assistant using Gemini Function Calling"""
     
     def __init__(self):
         self.file_processor = FileProcessor()
-        self.db = get_db()
+        self.db = get_async_db()
         
-        # Session cache for conversation history
-        self.sessions = {}
+        # Session cache for conversation history, least recently used first
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         
-        # Configure Gemini
-        google_api_key = getattr(settings, 'GOOGLE_API_KEY', None)
-        if not google_api_key:
-            logger.error("❌ GOOGLE_API_KEY not configured")
-            raise ValueError("GOOGLE_API_KEY not configured")
+        # Sessions waiting for the debounced Firebase write
+        self._dirty_sessions: Dict[str, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
         
-        genai.configure(api_key=google_api_key)
+        # Recent Firebase session reads, and reads currently in flight, by session key
+        self._firestore_cache: TTLCache = TTLCache(maxsize=MAX_SESSIONS, ttl=_SESSION_LOAD_TTL)
+        self._firestore_inflight: Dict[str, asyncio.Task] = {}
+        # Stored-message loads for sessions new to this process, merged before the first save
+        self._session_loads: Dict[str, asyncio.Task] = {}
         
-        # Create function declarations for the agent's tools
-        self.tools = self._create_tools()
+        # Recent tool results: key -> (expires_at, result), least recently used first
+        self._tool_cache: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
         
-        # Create the model with function calling enabled
-        self.model = genai.GenerativeModel(
-            model_name='gemini-2.0-flash-exp',
-            tools=self.tools,
-            system_instruction="""You are an expert educational AI assistant helping students comprehend their textbook reading.
-
-CAPABILITIES:
-- You have access to tools to extract and analyze PDF book content
-- You can answer questions, define terms, explain concepts, and summarize sections
-- You can search for information across multiple pages
-
-CRITICAL RULES:
-1. Always use your tools to find relevant information from the book before answering
-2. When answering, quote specific passages from the text and reference page numbers
-3. If you cannot find the answer in the book content, state that clearly
-4. Be concise but comprehensive
-5. Maintain a helpful and educational tone
-
-TOOL USAGE:
-- Use `get_page_content` to get the full text of a single page
-- Use `extract_page_range` to get text from multiple pages
-- Use `search_in_pages` to find specific keywords or phrases
-
-When a user asks a question:
-1. First consider what information you need
-2. Call the appropriate tool(s) to gather that information
-3. Analyze the results and formulate a clear, grounded answer
-"""
-        )
+        # Extracted page text per book: path -> (file version, {page_number: text}, {page_number: lowercased text})
+        self._page_index: "OrderedDict[str, Tuple[tuple, Dict[int, str], Dict[int, str]]]" = OrderedDict()
+        self._extract_semaphore = asyncio.Semaphore(_EXTRACT_CONCURRENCY)
+        self._background_tasks: set = set()  # Page index and session writes in flight
+        
+        # Persisted page indexes: one writer task per book, fed the latest pages to write
+        self._page_index_pending: Dict[str, Tuple[tuple, Dict[int, str]]] = {}
+        self._page_index_writers: Dict[str, asyncio.Task] = {}
+        self._page_index_files: Optional["OrderedDict[str, int]"] = None  # file -> size, least recently used first
+        
+        # Embedding indexes per book: path -> (file version, task building (vectors, [(page, passage)]))
+        self._semantic_index: "OrderedDict[str, Tuple[tuple, asyncio.Task]]" = OrderedDict()
+        
+        # Function declarations and the function-calling model are built once per process
+        self.tools = _shared_tools()
+        self.model = _shared_model()
         
         logger.info("✅ Reading Agent initialized with Gemini Function Calling")
-        logger.info("   Model: gemini-2.0-flash-exp")
+        logger.info(f"   Model: {_MODEL_NAME}")
         logger.info(f"   Tools: {len(self.tools)} functions available")
     
-    def _create_tools(self) -> List[Tool]:
+    @staticmethod
+    def _create_tools() -> List[Tool]:
         """Create function declarations for the agent's tools"""
         
         # Define function declarations that Gemini can call
@@ -138,18 +194,300 @@ When a user asks a question:
             }
         )
         
+        semantic_search = FunctionDeclaration(
+            name="semantic_search",
+            description="Finds the passages of the whole book most related in meaning to a query (handles paraphrases and misspellings) and returns them with page numbers",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "A description of the information to find"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of passages to return (default 5, max 10)"
+                    }
+                },
+                "required": ["query"]
+            }
+        )
+        
         # Return as a Tool object
-        return [Tool(function_declarations=[get_page_content, extract_page_range, search_in_pages])]
+        return [Tool(function_declarations=[get_page_content, extract_page_range, search_in_pages, semantic_search])]
+    
+    def _cache_get(self, key: tuple) -> Optional[Any]:
+        """Return a live tool cache entry, dropping it if expired"""
+        entry = self._tool_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._tool_cache[key]
+            return None
+        self._tool_cache.move_to_end(key)
+        return entry[1]
+    
+    def _cache_put(self, key: tuple, value: Any, ttl: float):
+        """Store a tool cache entry and evict the least recently used beyond the cap"""
+        self._tool_cache[key] = (time.monotonic() + ttl, value)
+        self._tool_cache.move_to_end(key)
+        while len(self._tool_cache) > _TOOL_CACHE_SIZE:
+            self._tool_cache.popitem(last=False)
+    
+    async def _get_pages(self, book_file_path: str, version: Optional[tuple], start_page: int, end_page: int) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """Page texts for a range from the page index, extracting missing pages in one batch.
+        Returns the book's (pages, lowercased pages) dicts; the lowercased ones fill in lazily."""
+        if start_page > end_page:
+            raise ValueError(f"Invalid page range {start_page}-{end_page}")
+        
+        entry = self._page_index.get(book_file_path)
+        if entry is None or entry[0] != version:
+            entry = (version, {}, {})
+            self._page_index[book_file_path] = entry
+            if version is not None:
+                # Rehydrate pages extracted before a restart
+                stored = await asyncio.to_thread(self._read_page_index, book_file_path, version)
+                for page, text in stored.items():
+                    entry[1].setdefault(page, text)
+                if stored:
+                    await self._remember_page_index_file(self._page_index_file(book_file_path))
+        self._page_index.move_to_end(book_file_path)
+        while len(self._page_index) > _PAGE_INDEX_BOOKS:
+            self._page_index.popitem(last=False)
+        
+        pages, lowered = entry[1], entry[2]
+        
+        # Group missing pages into contiguous spans
+        spans = []
+        for page in range(start_page, end_page + 1):
+            if page in pages:
+                continue
+            if spans and spans[-1][1] == page - 1:
+                spans[-1][1] = page
+            else:
+                spans.append([page, page])
+        
+        if spans:
+            extractions = []
+            for span_start, span_end in spans:
+                if span_end - span_start + 1 >= _RANGE_EXTRACT_MIN_PAGES:
+                    extractions.append(self._extract_span(book_file_path, span_start, span_end))
+                else:
+                    extractions.extend(
+                        self._extract_page(book_file_path, page) for page in range(span_start, span_end + 1)
+                    )
+            for extracted in await asyncio.gather(*extractions):
+                pages.update(extracted)
+            
+            if version is not None:
+                self._schedule_page_index_write(book_file_path, version, pages)
+        return pages, lowered
+    
+    def _schedule_page_index_write(self, book_file_path: str, version: tuple, pages: Dict[int, str]):
+        """Persist a book's pages in the background; writes for a book never overlap and use the latest pages"""
+        self._page_index_pending[book_file_path] = (version, pages)
+        if book_file_path not in self._page_index_writers:
+            task = asyncio.create_task(self._page_index_writer(book_file_path))
+            self._page_index_writers[book_file_path] = task
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+    
+    async def _page_index_writer(self, book_file_path: str):
+        """Write a book's pending page index until no newer one is queued"""
+        try:
+            while book_file_path in self._page_index_pending:
+                version, pages = self._page_index_pending.pop(book_file_path)
+                # Batches finished during a write are coalesced into the next one
+                size = await asyncio.to_thread(self._write_page_index, book_file_path, version, dict(pages))
+                if size is not None:
+                    await self._remember_page_index_file(self._page_index_file(book_file_path), size)
+        finally:
+            del self._page_index_writers[book_file_path]
+    
+    async def _remember_page_index_file(self, path: str, size: Optional[int] = None):
+        """Mark a persisted page index as most recently used and evict beyond the size cap"""
+        if self._page_index_files is None:
+            # Files persisted before a restart count towards the cap too, oldest first
+            self._page_index_files = OrderedDict(await asyncio.to_thread(self._scan_page_index_dir))
+        if size is None:
+            if path in self._page_index_files:
+                self._page_index_files.move_to_end(path)
+            return
+        
+        self._page_index_files[path] = size
+        self._page_index_files.move_to_end(path)
+        
+        total = sum(self._page_index_files.values())
+        while total > _PAGE_INDEX_MAX_BYTES and len(self._page_index_files) > 1:
+            evicted_path, evicted_size = self._page_index_files.popitem(last=False)
+            total -= evicted_size
+            try:
+                os.remove(evicted_path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _scan_page_index_dir() -> List[Tuple[str, int]]:
+        """(path, size) of every persisted page index, least recently modified first"""
+        stats = []
+        try:
+            for entry in os.scandir(_PAGE_INDEX_DIR):
+                if entry.name.endswith(".pages.json.z"):
+                    try:
+                        stats.append((entry.path, entry.stat()))
+                    except OSError:
+                        pass  # Replaced or evicted meanwhile
+        except FileNotFoundError:
+            return []
+        stats.sort(key=lambda item: item[1].st_mtime_ns)
+        return [(path, stat.st_size) for path, stat in stats]
+    
+    @staticmethod
+    def _page_index_file(book_file_path: str) -> str:
+        """On-disk location of a book's persisted page index"""
+        return os.path.join(_PAGE_INDEX_DIR, f"{hashlib.sha256(book_file_path.encode()).hexdigest()}.pages.json.z")
+    
+    @staticmethod
+    def _read_page_index(book_file_path: str, version: tuple) -> Dict[int, str]:
+        """Pages persisted for this exact file version, or {} if missing, stale or unreadable"""
+        try:
+            with open(ReadingAgentService._page_index_file(book_file_path), 'rb') as f:
+                stored = json.loads(zlib.decompress(f.read()))
+            if (stored.get("format") != _PAGE_INDEX_FORMAT or stored.get("path") != book_file_path
+                    or tuple(stored.get("version", ())) != tuple(version)):
+                return {}
+            return {int(page): text for page, text in stored["pages"].items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read persisted page index: {e}")
+            return {}
+    
+    @staticmethod
+    def _write_page_index(book_file_path: str, version: tuple, pages: Dict[int, str]) -> Optional[int]:
+        """Persist a book's extracted pages atomically; returns the file size, or None on failure"""
+        temp_path = None
+        try:
+            os.makedirs(_PAGE_INDEX_DIR, exist_ok=True)
+            payload = zlib.compress(json.dumps({
+                "format": _PAGE_INDEX_FORMAT,
+                "path": book_file_path,
+                "version": list(version),
+                "pages": pages
+            }).encode(), 3)
+            fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=_PAGE_INDEX_DIR)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(temp_path, ReadingAgentService._page_index_file(book_file_path))
+            return len(payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist page index: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+    
+    def _get_semantic_index(self, book_file_path: str, version: Optional[tuple]) -> asyncio.Task:
+        """Task building (or holding) the embedding index of a book, started on first use"""
+        entry = self._semantic_index.get(book_file_path)
+        if entry is not None and entry[0] == version:
+            task = entry[1]
+            if not (task.done() and (task.cancelled() or task.exception() is not None)):
+                self._semantic_index.move_to_end(book_file_path)
+                return task
+        
+        # New book, new file version or a failed build: index in the background
+        task = asyncio.create_task(self._build_semantic_index(book_file_path, version))
+        self._semantic_index[book_file_path] = (version, task)
+        self._semantic_index.move_to_end(book_file_path)
+        while len(self._semantic_index) > _PAGE_INDEX_BOOKS:
+            self._semantic_index.popitem(last=False)
+        return task
+    
+    async def _build_semantic_index(self, book_file_path: str, version: Optional[tuple]):
+        """Split a whole book into passages and embed them"""
+        page_count = await self.file_processor.get_pdf_page_count(book_file_path)
+        logger.info(f"🧭 Building semantic index for {page_count} pages of {book_file_path[:50]}")
+        pages, _ = await self._get_pages(book_file_path, version, 1, page_count)
+        
+        passages = []
+        for page in range(1, page_count + 1):
+            text = pages[page]
+            for offset in range(0, len(text), _PASSAGE_CHARS):
+                passage = text[offset:offset + _PASSAGE_CHARS].strip()
+                if passage:
+                    passages.append((page, passage))
+        
+        if not passages:
+            return np.zeros((0, 0), dtype=np.float32), passages
+        
+        embeddings = []
+        for offset in range(0, len(passages), _EMBED_BATCH_SIZE):
+            embedded = await genai.embed_content_async(
+                model=_EMBEDDING_MODEL,
+                content=[passage for _, passage in passages[offset:offset + _EMBED_BATCH_SIZE]],
+                task_type="retrieval_document"
+            )
+            embeddings.extend(embedded["embedding"])
+        
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(passages), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        
+        logger.info(f"✅ Semantic index ready: {len(passages)} passages")
+        return vectors, passages
+    
+    async def _prefetch_page(self, book_file_path: str, page_number: int):
+        """Warm the page index with one page; failures are left for the tool call to report"""
+        try:
+            version = await self.file_processor.get_file_version(book_file_path)
+            await self._get_pages(book_file_path, version, page_number, page_number)
+        except Exception as e:
+            logger.debug("Page prefetch failed for page %s: %s", page_number, e)
+    
+    async def _extract_page(self, book_file_path: str, page_number: int) -> Dict[int, str]:
+        """Extract a single page, bounded by the extraction semaphore"""
+        async with self._extract_semaphore:
+            return {page_number: await self.file_processor.extract_text_from_pdf_page(book_file_path, page_number)}
+    
+    async def _extract_span(self, book_file_path: str, start_page: int, end_page: int) -> Dict[int, str]:
+        """Extract a contiguous span with one range call and split it back into pages"""
+        async with self._extract_semaphore:
+            content = await self.file_processor.extract_text_from_pdf_pages(book_file_path, start_page, end_page)
+        parts = _PAGE_MARKER_RE.split(content)
+        return {int(number): text.strip() for number, text in zip(parts[1::2], parts[2::2])}
     
     async def _execute_function_call(self, function_name: str, function_args: Dict[str, Any], book_file_path: str) -> Dict[str, Any]:
+        """Execute a function call requested by the model, reusing recent identical results"""
+        ttl = _TOOL_CACHE_TTLS.get(function_name)
+        try:
+            version = await self.file_processor.get_file_version(book_file_path)
+        except Exception:
+            ttl = None  # Missing file: let the tool report the error
+        
+        if ttl is None:
+            return await self._run_tool(function_name, function_args, book_file_path, None)
+        
+        key = (function_name, book_file_path, version, tuple(sorted(function_args.items())))
+        cached = self._cache_get(key)
+        if cached is not None:
+            logger.info(f"⚡ Tool cache hit: {function_name}({function_args})")
+            return cached
+        
+        result = await self._run_tool(function_name, function_args, book_file_path, version)
+        if result.get("status") == "success":
+            self._cache_put(key, result, ttl)
+        return result
+    
+    async def _run_tool(self, function_name: str, function_args: Dict[str, Any], book_file_path: str, version: Optional[tuple]) -> Dict[str, Any]:
         """Execute a function call requested by the model"""
         
         try:
             if function_name == "get_page_content":
-                page_number = int(function_args.get("page_number"))  # Convert to int (Gemini sends floats)
+                page_number = function_args["page_number"]
                 logger.info(f"🔧 Executing: get_page_content(page={page_number})")
                 logger.info(f"   Book file path: {book_file_path}")
-                content = await self.file_processor.extract_text_from_pdf_page(book_file_path, page_number)
+                pages, _ = await self._get_pages(book_file_path, version, page_number, page_number)
+                content = pages[page_number]
                 logger.info(f"   ✅ Successfully extracted {len(content)} characters from page {page_number}")
                 return {
                     "status": "success",
@@ -159,11 +497,14 @@ When a user asks a question:
                 }
             
             elif function_name == "extract_page_range":
-                start_page = int(function_args.get("start_page"))  # Convert to int
-                end_page = int(function_args.get("end_page"))  # Convert to int
+                start_page = function_args["start_page"]
+                end_page = function_args["end_page"]
                 logger.info(f"🔧 Executing: extract_page_range(pages={start_page}-{end_page})")
                 logger.info(f"   Book file path: {book_file_path}")
-                content = await self.file_processor.extract_text_from_pdf_pages(book_file_path, start_page, end_page)
+                pages, _ = await self._get_pages(book_file_path, version, start_page, end_page)
+                content = "".join(
+                    f"\n--- Page {page} ---\n{pages[page]}\n" for page in range(start_page, end_page + 1)
+                ).strip()
                 logger.info(f"   ✅ Successfully extracted {len(content)} characters from pages {start_page}-{end_page}")
                 return {
                     "status": "success",
@@ -173,38 +514,90 @@ When a user asks a question:
                 }
             
             elif function_name == "search_in_pages":
-                query = function_args.get("query")
-                start_page = int(function_args.get("start_page"))  # Convert to int
-                end_page = int(function_args.get("end_page"))  # Convert to int
+                query = function_args["query"]
+                start_page = function_args["start_page"]
+                end_page = function_args["end_page"]
                 logger.info(f"🔧 Executing: search_in_pages(query='{query}', pages={start_page}-{end_page})")
                 
                 # Extract content from the page range
-                full_content = await self.file_processor.extract_text_from_pdf_pages(book_file_path, start_page, end_page)
+                pages, lowered = await self._get_pages(book_file_path, version, start_page, end_page)
                 
-                # Simple keyword search
+                # Keyword search page by page (first hit per line, like a line scan), stopping at the result limit
                 results = []
-                lines = full_content.split('\n')
-                current_page = start_page
-                
-                for line in lines:
-                    if line.startswith('--- Page '):
-                        try:
-                            current_page = int(line.split('Page ')[1].split(' ---')[0])
-                        except:
-                            pass
-                    elif query.lower() in line.lower():
-                        # Extract snippet around the match
-                        snippet_start = max(0, line.lower().find(query.lower()) - 50)
-                        snippet_end = min(len(line), line.lower().find(query.lower()) + len(query) + 50)
-                        snippet = line[snippet_start:snippet_end].strip()
+                needle = query.lower()
+                needle_len = len(needle)
+                for current_page in range(start_page, end_page + 1):
+                    if len(results) >= _SEARCH_MAX_RESULTS:
+                        break
+                    text = pages[current_page]
+                    buffer = lowered.get(current_page)
+                    if buffer is None:
+                        # Lowercase each page once per book version, not once per search
+                        buffer = lowered[current_page] = text.lower()
+                    pos = buffer.find(needle)
+                    while pos >= 0 and len(results) < _SEARCH_MAX_RESULTS:
+                        # Extract snippet around the match, within its line
+                        line_start = text.rfind('\n', 0, pos) + 1
+                        line_end = text.find('\n', pos + needle_len)
+                        if line_end < 0:
+                            line_end = len(text)
+                        snippet_start = max(line_start, pos - 50)
+                        snippet_end = min(line_end, pos + needle_len + 50)
+                        snippet = text[snippet_start:snippet_end].strip()
                         results.append(f"Page {current_page}: ...{snippet}...")
+                        
+                        pos = buffer.find(needle, line_end + 1)
                 
                 return {
                     "status": "success",
                     "query": query,
                     "pages_searched": f"{start_page}-{end_page}",
                     "matches_found": len(results),
-                    "results": results[:10]  # Limit to 10 results
+                    "results": results
+                }
+            
+            elif function_name == "semantic_search":
+                query = function_args["query"]
+                k = max(1, min(function_args.get("k") or 5, _SEMANTIC_MAX_RESULTS))
+                logger.info(f"🔧 Executing: semantic_search(query='{query}', k={k})")
+                
+                if np is None:
+                    return {
+                        "status": "error",
+                        "error": "Semantic search is not available - use search_in_pages instead"
+                    }
+                
+                try:
+                    vectors, passages = await asyncio.wait_for(
+                        asyncio.shield(self._get_semantic_index(book_file_path, version)),
+                        timeout=_SEMANTIC_INDEX_WAIT
+                    )
+                except asyncio.TimeoutError:
+                    return {
+                        "status": "error",
+                        "error": "The book is still being indexed for semantic search - use search_in_pages for now"
+                    }
+                if not passages:
+                    return {"status": "success", "query": query, "results": []}
+                
+                embedded = await genai.embed_content_async(
+                    model=_EMBEDDING_MODEL, content=query, task_type="retrieval_query"
+                )
+                query_vector = np.asarray(embedded["embedding"], dtype=np.float32)
+                query_vector /= np.linalg.norm(query_vector) or 1.0
+                
+                # Flat inner-product search over normalized vectors (cosine similarity)
+                scores = vectors @ query_vector
+                k = min(k, len(passages))
+                top = sorted(np.argpartition(-scores, k - 1)[:k], key=lambda i: -scores[i])
+                
+                return {
+                    "status": "success",
+                    "query": query,
+                    "results": [
+                        {"page": passages[i][0], "snippet": passages[i][1], "score": round(float(scores[i]), 3)}
+                        for i in top
+                    ]
                 }
             
             else:
@@ -240,44 +633,192 @@ When a user asks a question:
             }
             logger.info(f"📝 Created new session for {session_key}")
         
+        self._touch(session_key)
         return session_key
     
+    def _touch(self, session_key: str):
+        """Mark a session as most recently used and drop the oldest beyond MAX_SESSIONS"""
+        self.sessions.move_to_end(session_key)
+        while len(self.sessions) > MAX_SESSIONS:
+            evicted_key, _ = self.sessions.popitem(last=False)
+            self._session_loads.pop(evicted_key, None)
+    
     async def save_session_to_firebase(self, session_key: str):
         """Persist session to Firebase"""
+        if session_key in self.sessions:
+            await self._write_session(session_key, self.sessions[session_key])
+    
+    def _session_ref(self, user_id: str, book_id: str):
+        """Firestore document holding a user's reading session for a book"""
+        return self.db.collection('users').document(user_id)\
+            .collection('reading_sessions').document(book_id)
+    
+    @staticmethod
+    def _session_payload(session_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields written to Firebase for a session"""
+        return {
+            "messages": session_data["messages"][-20:],  # Keep last 20 messages
+            "last_updated": "now"
+        }
+    
+    async def _write_session(self, session_key: str, session_data: Dict[str, Any]):
+        """Write one session's recent messages to Firebase"""
         try:
-            if session_key in self.sessions:
-                session_data = self.sessions[session_key]
-                user_id = session_data["user_id"]
-                book_id = session_data["book_id"]
-                
-                # Save to Firebase under user's document
-                session_ref = self.db.collection('users').document(user_id)\
-                    .collection('reading_sessions').document(book_id)
-                
-                session_ref.set({
-                    "messages": session_data["messages"][-20:],  # Keep last 20 messages
-                    "last_updated": "now"
-                }, merge=True)
-                
-                logger.info(f"💾 Saved session to Firebase: {session_key}")
+            # Save to Firebase under user's document
+            session_ref = self._session_ref(session_data["user_id"], session_data["book_id"])
+            await session_ref.set(self._session_payload(session_data), merge=True)
+            
+            logger.info(f"💾 Saved session to Firebase: {session_key}")
         except Exception as e:
             logger.warning(f"⚠️ Could not save session to Firebase: {e}")
     
+    def _schedule_save(self, session_key: str):
+        """Persist a session in the background, coalescing saves within the debounce window"""
+        session_data = self.sessions.get(session_key)
+        if session_data is None:
+            return
+        # Hold the session itself so the write still happens if it is evicted meanwhile
+        self._dirty_sessions[session_key] = session_data
+        self._firestore_cache.pop(session_key, None)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_sessions())
+    
+    async def _flush_sessions(self):
+        """Write every session changed during the debounce window"""
+        await asyncio.sleep(_SESSION_SAVE_DELAY)
+        dirty, self._dirty_sessions = self._dirty_sessions, {}
+        self._flush_task = None
+        
+        # Tracked and shielded so shutdown can wait for a write that has already started
+        task = asyncio.ensure_future(self._write_sessions(dirty))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        await asyncio.shield(task)
+    
+    async def _write_sessions(self, dirty: Dict[str, Dict[str, Any]]):
+        """Batch-write the given sessions to Firebase"""
+        # One batched commit per window (Firestore allows up to 500 writes per batch)
+        items = list(dirty.items())
+        for offset in range(0, len(items), _FIRESTORE_BATCH_LIMIT):
+            chunk = items[offset:offset + _FIRESTORE_BATCH_LIMIT]
+            try:
+                batch = self.db.batch()
+                for session_key, session_data in chunk:
+                    batch.set(
+                        self._session_ref(session_data["user_id"], session_data["book_id"]),
+                        self._session_payload(session_data),
+                        merge=True
+                    )
+                await batch.commit()
+                logger.info(f"💾 Saved {len(chunk)} session(s) to Firebase")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not save sessions to Firebase: {e}")
+    
+    async def flush_pending_writes(self):
+        """Write debounced sessions now and wait for background writes - call on shutdown"""
+        if self._flush_task is not None:
+            # Still inside the debounce sleep, so nothing has been taken from _dirty_sessions yet
+            self._flush_task.cancel()
+            self._flush_task = None
+        dirty, self._dirty_sessions = self._dirty_sessions, {}
+        if dirty:
+            await self._write_sessions(dirty)
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+    
     async def load_session_from_firebase(self, user_id: str, book_id: str) -> Optional[Dict]:
-        """Load session from Firebase"""
+        """Load session from Firebase (recent reads are reused; concurrent reads share one fetch)"""
+        session_key = f"{user_id}:{book_id}"
+        if session_key in self._firestore_cache:
+            return self._firestore_cache[session_key]
+        
+        task = self._firestore_inflight.get(session_key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_session(session_key, user_id, book_id))
+            self._firestore_inflight[session_key] = task
+            task.add_done_callback(lambda _: self._firestore_inflight.pop(session_key, None))
+        
+        # Shielded so a cancelled caller doesn't cancel the fetch the other callers are waiting on
+        return await asyncio.shield(task)
+    
+    async def _fetch_session(self, session_key: str, user_id: str, book_id: str) -> Optional[Dict]:
+        """Read one session document from Firebase and cache it briefly"""
         try:
-            session_ref = self.db.collection('users').document(user_id)\
-                .collection('reading_sessions').document(book_id)
-            
-            doc = session_ref.get()
-            if doc.exists:
-                logger.info(f"📂 Loaded session from Firebase for {user_id}:{book_id}")
-                return doc.to_dict()
-            return None
+            doc = await self._session_ref(user_id, book_id).get()
+            session_data = doc.to_dict() if doc.exists else None
+            if session_data is not None:
+                logger.info(f"📂 Loaded session from Firebase for {session_key}")
+            self._firestore_cache[session_key] = session_data
+            return session_data
         except Exception as e:
             logger.warning(f"⚠️ Could not load session from Firebase: {e}")
             return None
     
+    def _start_session(self, user_id: str, book_id: str) -> str:
+        """get_or_create_session; a session new to this process starts loading its stored messages in the background"""
+        session_key = f"{user_id}:{book_id}"
+        is_new = session_key not in self.sessions
+        session_key = self.get_or_create_session(user_id, book_id)
+        if is_new:
+            self._session_loads[session_key] = asyncio.create_task(
+                self.load_session_from_firebase(user_id, book_id)
+            )
+        return session_key
+    
+    async def _merge_stored_messages(self, session_key: str):
+        """Put a session's stored messages ahead of the new ones (saves overwrite them), once"""
+        task = self._session_loads.get(session_key)
+        if task is None:
+            return
+        stored = await asyncio.shield(task)
+        if self._session_loads.pop(session_key, None) is not task:
+            return  # Another request for this session merged first
+        session = self.sessions.get(session_key)
+        if session is not None and stored:
+            session["messages"][:0] = stored.get("messages") or []
+    
+    @staticmethod
+    def _book_header(book_metadata: Dict[str, Any]) -> str:
+        """Session-invariant book details, sent ahead of the question as the first chat turn"""
+        return (
+            f"Book: {book_metadata.get('title')} by {book_metadata.get('author')}\n"
+            f"Subject: {book_metadata.get('subject')}\n"
+            f"Total pages: {book_metadata.get('total_pages')}"
+        )
+    
+    @staticmethod
+    def _function_calls(resp) -> list:
+        """Every function call in a response - Gemini may request several at once"""
+        try:
+            if not resp.candidates:
+                return []
+            parts = resp.candidates[0].content.parts
+            if not parts:
+                return []
+            return [part.function_call for part in parts if hasattr(part, 'function_call') and part.function_call]
+        except:
+            return []
+    
+    @staticmethod
+    def _response_text(resp) -> str:
+        """Concatenated text parts of a (possibly partial) response"""
+        try:
+            if not resp.candidates:
+                return ""
+            return "".join(part.text for part in resp.candidates[0].content.parts if part.text)
+        except:
+            return ""
+    
+    @staticmethod
+    def _tool_args(function_call) -> Dict[str, Any]:
+        """Read a call's arguments off the proto map once, as ints where the tool expects them (Gemini sends floats)"""
+        args = {}
+        for key, value in function_call.args.items():
+            if key in _INT_ARGS and isinstance(value, float):
+                value = int(value)
+            args[key] = value
+        return args
+    
     async def ask_question(
         self,
         question: str,
@@ -292,15 +833,34 @@ When a user asks a question:
         Ask the reading agent a question.
         Agent will use tools to extract relevant content and reason about the answer.
         """
+        result = None
+        async for event in self.ask_question_stream(
+            question, book_file_path, book_metadata, user_id, current_page, selected_text, conversation_history
+        ):
+            if event["type"] == "done":
+                result = event["result"]
+        return result
+    
+    async def ask_question_stream(
+        self,
+        question: str,
+        book_file_path: str,
+        book_metadata: Dict[str, Any],
+        user_id: str,
+        current_page: int,
+        selected_text: Optional[str] = None,
+        conversation_history: Optional[list] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Ask the reading agent a question, streaming the answer as it is generated.
+        Yields {"type": "delta", "text": ...} events, then one {"type": "done", "result": ...} event.
+        """
         try:
-            session_key = self.get_or_create_session(user_id, book_metadata.get("book_id", "unknown"))
+            session_key = self._start_session(user_id, book_metadata.get("book_id", "unknown"))
             
-            # Build context for the agent
+            # Only the volatile part of the request goes in the message; the book header is a stable prefix
             context_parts = []
-            context_parts.append(f"Book: {book_metadata.get('title')} by {book_metadata.get('author')}")
-            context_parts.append(f"Subject: {book_metadata.get('subject')}")
-            context_parts.append(f"Student is currently on page {current_page} of {book_metadata.get('total_pages')} pages")
-            context_parts.append(f"Book file path: {book_file_path}")
+            context_parts.append(f"Student is currently on page {current_page}")
             
             if selected_text:
                 context_parts.append(f"\nStudent has selected this text: \"{selected_text}\"")
@@ -315,113 +875,122 @@ When a user asks a question:
             logger.info(f"   Has selected text: {selected_text is not None}")
             logger.info(f"   Book file: {book_file_path[:50]}...")
             
-            # Start a chat session for multi-turn conversation
-            chat = self.model.start_chat(history=[])
-            
-            # Send the prompt and handle function calling loop
-            response = await chat.send_message_async(full_prompt)
+            # Start a chat session seeded with the static book header
+            chat = self.model.start_chat(history=[
+                {"role": "user", "parts": [self._book_header(book_metadata)]},
+                {"role": "model", "parts": ["Acknowledged."]}
+            ])
             
             # Handle function calling loop
             max_iterations = 5  # Prevent infinite loops
             iterations = 0
+            function_calls_made = 0
+            seen_calls = set()  # (name, args) already answered in this request
+            repeat_turns = 0
             
-            # Check if response has a function call in any part
-            def has_function_call(resp):
-                try:
-                    if not resp.candidates:
-                        return False
-                    parts = resp.candidates[0].content.parts
-                    if not parts:
-                        return False
-                    # Check if any part contains a function call
-                    for part in parts:
-                        if hasattr(part, 'function_call') and part.function_call:
-                            return True
-                    return False
-                except:
-                    return False
-            
-            # Get the first function call from response parts
-            def get_function_call(resp):
-                try:
-                    if not resp.candidates:
-                        return None
-                    parts = resp.candidates[0].content.parts
-                    if not parts:
-                        return None
-                    # Return the first function call found
-                    for part in parts:
-                        if hasattr(part, 'function_call') and part.function_call:
-                            return part.function_call
-                    return None
-                except:
-                    return None
+            # The model almost always reads the current page first - extract it while the first turn generates
+            prefetch = asyncio.create_task(self._prefetch_page(book_file_path, current_page))
             
-            while has_function_call(response) and iterations < max_iterations:
-                iterations += 1
-                function_call = get_function_call(response)
-                if not function_call:
-                    logger.warning("⚠️ has_function_call returned True but couldn't extract function call")
+            # Every turn is streamed: answer text is forwarded as it arrives, tool turns are consumed whole
+            streamed_chunks = []  # Text already sent to the client by earlier (tool) turns
+            message = full_prompt
+            while True:
+                response = await chat.send_message_async(message, stream=True)
+                answer_chunks = []
+                tool_turn = False
+                async for chunk in response:
+                    # Once a chunk carries a function call, the rest of the turn's text is tool narration
+                    if not tool_turn and self._function_calls(chunk):
+                        tool_turn = True
+                    text = self._response_text(chunk)
+                    if text and not tool_turn:
+                        answer_chunks.append(text)
+                        yield {"type": "delta", "text": text}
+                
+                function_calls = self._function_calls(response)
+                if not function_calls or iterations >= max_iterations:
                     break
-                function_name = function_call.name
-                function_args = dict(function_call.args)
                 
-                logger.info(f"🔧 Model requested function: {function_name}")
-                logger.info(f"   Args: {function_args}")
+                # Text streamed before the call showed up was already shown - keep it in the saved answer
+                streamed_chunks.extend(answer_chunks)
                 
-                # Execute the function
-                function_result = await self._execute_function_call(
-                    function_name,
-                    function_args,
-                    book_file_path
-                )
+                function_calls_made += len(function_calls)
+                call_args = [self._tool_args(function_call) for function_call in function_calls]
+                call_keys = [
+                    (function_call.name, frozenset(args.items()))
+                    for function_call, args in zip(function_calls, call_args)
+                ]
                 
-                logger.info(f"✅ Function executed: {function_name}")
-                logger.info(f"   Result status: {function_result.get('status')}")
-                if function_result.get('status') == 'error':
-                    logger.error(f"   ⚠️ Function returned error: {function_result.get('error')}")
-                    logger.error(f"   Error details: {function_result.get('details', 'N/A')}")
+                # A turn that only repeats earlier calls is answered from the tool cache; let one through for free
+                all_repeated = all(key in seen_calls for key in call_keys)
+                seen_calls.update(call_keys)
+                if all_repeated and repeat_turns == 0:
+                    repeat_turns += 1
+                    logger.info("♻️ Model repeated earlier function calls - serving cached results")
                 else:
-                    if 'char_count' in function_result:
-                        logger.info(f"   Content length: {function_result.get('char_count')} chars")
+                    iterations += 1
+                
+                for function_call, args in zip(function_calls, call_args):
+                    logger.info(f"🔧 Model requested function: {function_call.name}")
+                    logger.info(f"   Args: {args}")
+                
+                if prefetch is not None:
+                    await prefetch
+                    prefetch = None
+                
+                # Independent calls from the same turn run concurrently
+                function_results = await asyncio.gather(*(
+                    self._execute_function_call(function_call.name, args, book_file_path)
+                    for function_call, args in zip(function_calls, call_args)
+                ))
                 
-                # Send function result back to the model
-                response = await chat.send_message_async(
+                for function_call, function_result in zip(function_calls, function_results):
+                    logger.info(f"✅ Function executed: {function_call.name}")
+                    logger.info(f"   Result status: {function_result.get('status')}")
+                    if function_result.get('status') == 'error':
+                        logger.error(f"   ⚠️ Function returned error: {function_result.get('error')}")
+                        logger.error(f"   Error details: {function_result.get('details', 'N/A')}")
+                    else:
+                        if 'char_count' in function_result:
+                            logger.info(f"   Content length: {function_result.get('char_count')} chars")
+                
+                # Send all function results back to the model in a single turn
+                response_parts = [
                     genai.protos.Part(
                         function_response=genai.protos.FunctionResponse(
-                            name=function_name,
+                            name=function_call.name,
                             response=function_result
                         )
                     )
-                )
+                    for function_call, function_result in zip(function_calls, function_results)
+                ]
+                
+                # Nudge the model to answer instead of spending another round-trip on tools
+                if all_repeated:
+                    response_parts.append(genai.protos.Part(text="You already have this content; answer now."))
+                elif iterations == 1 and all(
+                    result.get('status') == 'success' and result.get('char_count', _SHORT_RESULT_CHARS) < _SHORT_RESULT_CHARS
+                    for result in function_results
+                ):
+                    response_parts.append(genai.protos.Part(text="Provide the final answer now based on the retrieved content."))
+                
+                message = response_parts
+            
+            if prefetch is not None:
+                prefetch.cancel()
             
             logger.info(f"🔄 Function calling loop completed after {iterations} iterations")
-            logger.info(f"   Response has function call: {has_function_call(response)}")
+            logger.info(f"   Response has function call: {bool(function_calls)}")
             
-            # Extract the final answer (now it should be text, not a function call)
-            try:
-                answer = response.text.strip()
-                logger.info(f"✅ Successfully extracted answer text")
-            except Exception as e:
-                logger.error(f"❌ Could not extract text from response: {e}")
-                logger.error(f"   Response has candidates: {bool(response.candidates)}")
-                if response.candidates:
-                    logger.error(f"   Response parts count: {len(response.candidates[0].content.parts)}")
-                    logger.error(f"   First part type: {type(response.candidates[0].content.parts[0])}")
-                
-                # Fallback: try to get text from parts
-                answer = ""
-                if response.candidates and response.candidates[0].content.parts:
-                    for part in response.candidates[0].content.parts:
-                        if hasattr(part, 'text') and part.text:
-                            answer += part.text
-                            logger.info(f"   Extracted text from part: {len(part.text)} chars")
-                
-                if not answer:
-                    logger.error("   No text could be extracted from response")
-                    answer = "I apologize, but I encountered an issue processing your question. Please try rephrasing it."
+            # The final answer is exactly what was streamed to the client
+            answer = "".join(streamed_chunks + answer_chunks).strip()
+            if not answer:
+                logger.error("   No text could be extracted from response")
+                answer = "I apologize, but I encountered an issue processing your question. Please try rephrasing it."
+                yield {"type": "delta", "text": answer}
             
             # Update session
+            await self._merge_stored_messages(session_key)
             if session_key in self.sessions:
                 self.sessions[session_key]["messages"].append({
                     "role": "user",
@@ -432,19 +1001,22 @@ When a user asks a question:
                     "content": answer
                 })
             
-            # Persist to Firebase
-            await self.save_session_to_firebase(session_key)
+            # Persist to Firebase off the response path
+            self._schedule_save(session_key)
             
             logger.info(f"✅ Agent response generated")
             logger.info(f"   Response length: {len(answer)} chars")
-            logger.info(f"   Function calls made: {iterations}")
+            logger.info(f"   Function calls made: {function_calls_made}")
             
-            return {
-                "answer": answer,
-                "confidence": 0.95,
-                "agent_used_tools": iterations > 0,  # True if model called any functions
-                "function_calls_made": iterations,
-                "session_key": session_key
+            yield {
+                "type": "done",
+                "result": {
+                    "answer": answer,
+                    "confidence": 0.95,
+                    "agent_used_tools": function_calls_made > 0,  # True if model called any functions
+                    "function_calls_made": function_calls_made,
+                    "session_key": session_key
+                }
             }
             
         except Exception as e:
@@ -453,6 +1025,42 @@ When a user asks a question:
             raise
 
 
+# Set once genai.configure has run in this process
+_configured = False
+
+
+def _configure_genai():
+    """Configure the Gemini client with the API key, once per process"""
+    global _configured
+    if _configured:
+        return
+    
+    google_api_key = getattr(settings, 'GOOGLE_API_KEY', None)
+    if not google_api_key:
+        logger.error("❌ GOOGLE_API_KEY not configured")
+        raise ValueError("GOOGLE_API_KEY not configured")
+    
+    genai.configure(api_key=google_api_key)
+    _configured = True
+
+
+@functools.cache
+def _shared_tools() -> List[Tool]:
+    """The agent's tool declarations, built once"""
+    return ReadingAgentService._create_tools()
+
+
+@functools.cache
+def _shared_model() -> genai.GenerativeModel:
+    """The function-calling model, built once"""
+    _configure_genai()
+    return genai.GenerativeModel(
+        model_name=_MODEL_NAME,
+        tools=_shared_tools(),
+        system_instruction=_SYSTEM_INSTRUCTION
+    )
+
+
 # Global agent instance
 _reading_agent_service = None
 
@@ -2,102 +2,36 @@
 Ninja Tutor Backend API
 FastAPI application with Firebase integration
 """
-import os
-import logging
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from contextlib import asynccontextmanager
+import sys
 import uvicorn
 
 from app.core.config import settings
-from app.core.firebase_config import initialize_firebase
-from app.api.v1.router import api_router
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logger = logging.getLogger(__name__)
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan management"""
-    # Startup
-    logger.info("🚀 Starting Ninja Tutor Backend...")
-    logger.debug(f"Debug mode: {settings.DEBUG}")
-    logger.debug(f"Log level: {settings.LOG_LEVEL}")
-    
-    initialize_firebase()
-    logger.info("✅ Firebase initialized")
-    
-    # Create upload directory
-    os.makedirs("uploads", exist_ok=True)
-    logger.info("✅ Upload directory ready")
-    
-    yield
-    
-    # Shutdown
-    logger.info("🛑 Shutting down Ninja Tutor Backend...")
-
-
-# Create FastAPI app
-app = FastAPI(
-    title="Ninja Tutor API",
-    description="Backend API for Ninja Tutor educational platform",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    lifespan=lifespan
-)
-
-# Ensure upload directory exists before mounting static files
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",  # Flutter web dev server
-        "http://127.0.0.1:3000",  # Alternative localhost
-        "http://localhost:8080",  # Alternative Flutter port
-        "http://127.0.0.1:8080",  # Alternative localhost
-        "*"  # Allow all for development (remove in production)
-    ],
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
-    expose_headers=["*"],  # Expose all headers
-)
-
-# Static files for uploaded content
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
-
-# Static files for PDF.js viewer
-pdfjs_dir = os.path.join(os.path.dirname(__file__), "pdfjs")
-if os.path.exists(pdfjs_dir):
-    app.mount("/pdfjs", StaticFiles(directory=pdfjs_dir, html=True), name="pdfjs")
-    logger.info("✅ PDF.js viewer mounted at /pdfjs")
-
-# API routes
-app.include_router(api_router, prefix="/api/v1")
-
-# Health check
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "message": "Ninja Tutor Backend is running"}
+# The application lives in app.main. Build it only when uvicorn imports this module as
+# "main:app" - not when it's run as a script (which just starts uvicorn) and not when a
+# spawned worker process (e.g. the PDF extraction pool) re-runs it as __mp_main__.
+if __name__ not in ("__main__", "__mp_main__"):
+    from app.main import app  # noqa: F401
 
 
 if __name__ == "__main__":
+    # Caches, reading sessions and the process pool live in this process - one worker unless opted in
+    workers = settings.WEB_CONCURRENCY or 1
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG,
-        log_level="info",
-        access_log=True,
+        workers=workers,
+        reload=settings.DEBUG and workers == 1,  # uvicorn can't reload a worker pool
+        backlog=settings.BACKLOG,
+        timeout_keep_alive=settings.TIMEOUT_KEEP_ALIVE,
+        limit_concurrency=settings.LIMIT_CONCURRENCY,
+        limit_max_requests=settings.LIMIT_MAX_REQUESTS,
+        loop="uvloop" if sys.platform != "win32" else "auto",  # uvloop is POSIX-only
+        http="httptools",
+        ws="none",  # No WebSocket routes
+        interface="asgi3",
+        log_level="info" if settings.DEBUG else "warning",  # Applied to the uvicorn.* loggers
+        access_log=settings.DEBUG,  # Per-request log lines are a development aid
         log_config=None  # Use our custom logging config
     )